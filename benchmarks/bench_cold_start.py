@@ -0,0 +1,130 @@
+"""
+Cold start and memory of the serving app under gunicorn, with and without
+preloading the app (and default model) in the master.
+
+    $ python benchmarks/bench_cold_start.py --workers 4
+
+For each mode a fresh gunicorn is started on a seeded artifact store and
+timed until /readyz answers 200, then a burst of /predict requests is sent
+(the slowest of them shows what the first request on a cold worker costs).
+Memory is read from /proc (Linux only): RSS counts shared pages in every
+process, PSS splits them between the processes sharing them, so PSS is what
+preloading saves.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+from common import ROOT
+from suite import train_model
+
+
+def children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """Rss and Pss of a process, in kB, from /proc/<pid>/smaps_rollup."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key] = int(rest.split()[0])
+    except FileNotFoundError:
+        pass
+    return values
+
+
+def wait_for(url: str, deadline: float, status: int = 200):
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == status:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"{url} not answering {status}")
+
+
+def run_mode(preload: bool, workers: int, port: int, env: Dict[str, str], burst: int) -> Dict:
+    base = f"http://127.0.0.1:{port}"
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py",
+         "--workers", str(workers), "--bind", f"127.0.0.1:{port}", "app:app"],
+        cwd=ROOT / "serving",
+        env={**os.environ, **env, "PRELOAD_MODEL": "1" if preload else "0"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(f"{base}/readyz", start + 120)
+        ready = time.monotonic() - start
+
+        latencies = []
+        for i in range(burst):
+            t = time.perf_counter()
+            # a fresh connection per request spreads the burst over the workers
+            requests.post(f"{base}/predict", json=[{"distance": float(i % 90)}]).raise_for_status()
+            latencies.append(time.perf_counter() - t)
+
+        worker_mem = [memory_kb(pid) for pid in children(proc.pid)]
+        master_mem = memory_kb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    return {
+        "ready_s": ready,
+        "first_ms": latencies[0] * 1e3,
+        "max_ms": max(latencies) * 1e3,
+        "median_ms": sorted(latencies)[len(latencies) // 2] * 1e3,
+        "worker_rss_mb": [m.get("Rss", 0) / 1024 for m in worker_mem],
+        "worker_pss_mb": [m.get("Pss", 0) / 1024 for m in worker_mem],
+        "total_pss_mb": (sum(m.get("Pss", 0) for m in worker_mem) + master_mem.get("Pss", 0)) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare gunicorn cold start with and without preloading")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5098)
+    parser.add_argument("--burst", type=int, default=40, help="/predict requests sent once ready")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            "ARTIFACT_STORE": str(train_model(Path(workdir))),
+            "FLASK_LOG": str(Path(workdir) / "flask.log"),
+            "PROMETHEUS_MULTIPROC_DIR": str(Path(workdir) / "prometheus"),
+        }
+        results = {
+            "lazy (per worker)": run_mode(False, args.workers, args.port, env, args.burst),
+            "preload (master)": run_mode(True, args.workers, args.port, env, args.burst),
+        }
+
+    print(f"\ngunicorn cold start, {args.workers} workers")
+    print(f"{'mode':<20} {'ready (s)':>10} {'1st (ms)':>10} {'max (ms)':>10} {'p50 (ms)':>10} "
+          f"{'RSS/worker':>11} {'PSS/worker':>11} {'PSS total':>10}")
+    for mode, r in results.items():
+        rss = sum(r["worker_rss_mb"]) / max(len(r["worker_rss_mb"]), 1)
+        pss = sum(r["worker_pss_mb"]) / max(len(r["worker_pss_mb"]), 1)
+        print(f"{mode:<20} {r['ready_s']:>10.2f} {r['first_ms']:>10.1f} {r['max_ms']:>10.1f} "
+              f"{r['median_ms']:>10.1f} {rss:>9.1f}MB {pss:>9.1f}MB {r['total_pss_mb']:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
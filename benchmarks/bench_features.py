@@ -0,0 +1,128 @@
+"""
+Compare the vectorized build_features against the original per-play loop
+over a synthetic 82-game season.
+
+    $ python benchmarks/bench_features.py
+"""
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from common import add_to_path, print_table, time_calls
+
+add_to_path("ift6758")
+add_to_path("ift6758", "ift6758", "client")
+from features import EVENT_MAP, build_features, get_mapping_tables, parse_strength  # noqa: E402
+from ift6758.data.synthetic import make_game_payload, season_game_ids  # noqa: E402
+
+N_GAMES = 82
+
+
+def build_features_loop(events: List[Dict], payload: Dict) -> pd.DataFrame:
+    """The original one-play-at-a-time implementation, kept as the reference."""
+    player_name, team_name = get_mapping_tables(payload)
+
+    home_id = payload.get("homeTeam", {}).get("id")
+    away_id = payload.get("awayTeam", {}).get("id")
+
+    plays = []
+    for play in events:
+        event = play.get("typeDescKey")
+        if event not in EVENT_MAP:
+            continue
+
+        d = play.get("details", {}) or {}
+        shooter_id = d.get("scoringPlayerId") or d.get("shootingPlayerId")
+        goalie_id = d.get("goalieInNetId")
+        team_id = d.get("eventOwnerTeamId")
+
+        team_side = "HOME" if team_id == home_id else "AWAY"
+
+        x = d.get("xCoord")
+        y = d.get("yCoord")
+
+        is_goal = 1 if EVENT_MAP.get(event) == "GOAL" else 0
+
+        empty_net = int(goalie_id is None or goalie_id == 0)
+
+        distance = None
+        angle_from_net = None
+        if x is not None and y is not None:
+            distance = int(
+                np.sqrt((89 - abs(x))**2 + (0 - abs(y))**2).round()
+            )
+            angle_from_net = float(
+                np.degrees(np.arctan2(abs(y), 89 - x))
+            )
+
+        plays.append(
+            {
+                "event_id": play.get("eventId"),
+
+                "period": play.get("periodDescriptor", {}).get("number"),
+                "period_type": play.get("periodDescriptor", {}).get("periodType"),
+                "time_remaining": play.get("timeRemaining"),
+
+                "strength": parse_strength(play.get("situationCode")),
+                "event_type": EVENT_MAP.get(event),
+
+                "team_id": team_id,
+                "team_name": team_name.get(team_id, {}).get("name"),
+                "team_abbr": team_name.get(team_id, {}).get("abbrev"),
+                "team_side": team_side,
+                "is_home": (team_side == "HOME"),
+
+                "shooter_id": shooter_id,
+                "shooter_name": player_name.get(shooter_id),
+                "goalie_id": goalie_id,
+                "goalie_name": player_name.get(goalie_id),
+
+                "shot_type": d.get("shotType"),
+
+                "home_team": team_name.get(home_id, {}).get("name"),
+                "away_team": team_name.get(away_id, {}).get("name"),
+
+                "is_goal": is_goal,
+                "empty_net": empty_net,
+                "distance": distance,
+                "angle_from_net": angle_from_net,
+            }
+        )
+
+    return pd.DataFrame(plays)
+
+
+def check_equal(payloads: List[Dict]):
+    for payload in payloads:
+        plays = payload["plays"]
+        # whole game, a short tail, a slice without shots and one without coordinates
+        no_xy = [dict(p, details={k: v for k, v in p["details"].items() if k not in ("xCoord", "yCoord")}) for p in plays]
+        for events in (plays, plays[-5:], [p for p in plays if p["typeDescKey"] == "faceoff"], no_xy[:40], []):
+            pd.testing.assert_frame_equal(
+                build_features(events, payload), build_features_loop(events, payload)
+            )
+
+
+def main():
+    season = [make_game_payload(game_id) for game_id in season_game_ids(2023, N_GAMES)]
+    check_equal(season)
+
+    def run_season(fn):
+        return [fn(payload["plays"], payload) for payload in season]
+
+    rows = {}
+    game = season[0]
+    rows["1 game, loop"] = time_calls(lambda: build_features_loop(game["plays"], game), repeat=100)
+    rows["1 game, vectorized"] = time_calls(lambda: build_features(game["plays"], game), repeat=100)
+    rows[f"{N_GAMES} games, loop"] = time_calls(lambda: run_season(build_features_loop), repeat=5, warmup=1)
+    rows[f"{N_GAMES} games, vectorized"] = time_calls(lambda: run_season(build_features), repeat=5, warmup=1)
+
+    n_shots = sum(len(df) for df in run_season(build_features))
+    print(f"{N_GAMES} synthetic games, {sum(len(p['plays']) for p in season)} plays, {n_shots} shots")
+    print_table("build_features", rows)
+
+
+if __name__ == "__main__":
+    main()
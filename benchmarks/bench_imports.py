@@ -0,0 +1,106 @@
+"""
+Import cost of the serving app, from ``python -X importtime``.
+
+    $ python benchmarks/bench_imports.py --repeat 5 --top 15
+
+Each case runs in a fresh interpreter from serving/ (as gunicorn does) with
+PRELOAD_MODEL=0:
+
+    app                  ``import app``: what a worker (or the preloading
+                         master) pays before it can answer /healthz
+    app, eager deps      the modules app.py used to import up front (wandb,
+                         sklearn, pandas, joblib, scipy.special, pyarrow)
+                         imported first, for comparison
+    app + default model  ``import app; app.init_app()``: ready to serve /predict
+
+"imports" is the sum of the top-level cumulative times that ``-X importtime``
+reports; "wall" also counts interpreter start-up and, for the last case, loading
+the model. Medians over ``--repeat`` runs. ``--top`` lists the most expensive
+imports of the first run of each case.
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from common import ROOT
+from suite import train_model
+
+EAGER_DEPS = ["wandb", "sklearn", "pandas", "joblib", "scipy.special", "pyarrow"]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) per line of ``-X importtime`` output; nesting kept in the name."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name[1:], int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_case(code: str, env: Dict[str, str]) -> Tuple[float, List[Tuple[str, int, int]]]:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT / "serving",
+        env={**os.environ, **env, "PRELOAD_MODEL": "0"},
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{proc.stderr[-2000:]}")
+    return wall, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import cost of the serving app")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="most expensive imports listed per case")
+    args = parser.parse_args()
+
+    eager = [m for m in EAGER_DEPS if importlib.util.find_spec(m.split(".")[0]) is not None]
+    cases = {
+        "app": "import app",
+        "app, eager deps": f"import {', '.join(eager)}; import app" if eager else "import app",
+        "app + default model": "import app; app.init_app(); assert app.app.active is not None",
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            "ARTIFACT_STORE": str(train_model(Path(workdir))),
+            "FLASK_LOG": str(Path(workdir) / "flask.log"),
+        }
+        results = {}
+        for name, code in cases.items():
+            runs = [run_case(code, env) for _ in range(args.repeat)]
+            results[name] = {
+                "wall_ms": statistics.median(wall for wall, _ in runs) * 1e3,
+                "imports_ms": statistics.median(
+                    sum(cum for module, _, cum in rows if not module.startswith(" ")) for _, rows in runs
+                ) / 1e3,
+                "rows": runs[0][1],
+            }
+
+    print(f"\nserving app import cost (median of {args.repeat}; not installed: "
+          f"{', '.join(sorted(set(EAGER_DEPS) - set(eager))) or 'none'})")
+    print(f"{'case':<24} {'imports (ms)':>13} {'wall (ms)':>10}")
+    for name, r in results.items():
+        print(f"{name:<24} {r['imports_ms']:>13.1f} {r['wall_ms']:>10.1f}")
+
+    for name, r in results.items():
+        print(f"\n{name}: top {args.top} imports by cumulative time")
+        for module, _, cumulative in sorted(r["rows"], key=lambda row: -row[2])[:args.top]:
+            print(f"  {cumulative / 1e3:>9.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
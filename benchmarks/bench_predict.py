@@ -0,0 +1,77 @@
+"""
+Compare the legacy pandas /predict path against the NumPy fast path and the
+precomputed lookup grid. The app only uses the grid (GRID_INFERENCE=1) for
+models without the linear fast path; the grid rows here show what it would
+cost for ours.
+
+    $ python benchmarks/bench_predict.py
+
+Both paths start from the decoded JSON payload (list of records, as sent by
+ServingClient) and end with the list of probabilities put in the response.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from common import add_to_path, print_table, time_calls
+
+add_to_path("serving")
+from inference import features_to_array, make_grid_scorer, make_scorer  # noqa: E402
+
+MODELS = {
+    "distance": ["distance"],
+    "distance_angle": ["distance", "angle_from_net"],
+}
+SIZES = [1, 10_000]
+GRID = {"distance": (0, 200, 1), "angle_from_net": (0, 180, 1)}
+
+
+def synthetic_shots(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    distance = rng.integers(0, 190, size=n)
+    angle = rng.uniform(0, 180, size=n)
+    is_goal = rng.random(n) < 1 / (1 + np.exp(0.08 * distance - 1))
+    return pd.DataFrame({"distance": distance, "angle_from_net": angle, "is_goal": is_goal})
+
+
+def pandas_predict(model, payload, required):
+    X = pd.DataFrame.from_dict(payload)
+    X = X[required]
+    return model.predict_proba(X)[:, 1].tolist()
+
+
+def fast_predict(scorer, payload, required):
+    return scorer(features_to_array(payload, required)).tolist()
+
+
+def main():
+    train = synthetic_shots(5_000, seed=1)
+    rows = {}
+    for name, required in MODELS.items():
+        model = LogisticRegression().fit(train[required], train["is_goal"])
+        scorer = make_scorer(model)
+        grid = make_grid_scorer(model, [GRID[c] for c in required], fallback=scorer)
+
+        for n in SIZES:
+            payload = synthetic_shots(n)[required].to_dict(orient="records")
+            np.testing.assert_allclose(
+                fast_predict(scorer, payload, required),
+                pandas_predict(model, payload, required),
+                rtol=1e-12,
+            )
+            repeat = 500 if n == 1 else 50
+            rows[f"{name} n={n} pandas"] = time_calls(
+                lambda: pandas_predict(model, payload, required), repeat=repeat
+            )
+            rows[f"{name} n={n} fast"] = time_calls(
+                lambda: fast_predict(scorer, payload, required), repeat=repeat
+            )
+            rows[f"{name} n={n} grid"] = time_calls(
+                lambda: fast_predict(grid, payload, required), repeat=repeat
+            )
+
+    print_table("/predict inference path", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Small timing helpers shared by the benchmark scripts."""
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def add_to_path(*parts: str):
+    """Make a repo directory (e.g. ``serving``) importable, like the containers do."""
+    path = str(ROOT.joinpath(*parts))
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def time_calls(fn: Callable[[], object], repeat: int = 200, warmup: int = 5) -> Dict[str, float]:
+    """Call ``fn`` ``repeat`` times and return latency percentiles (and their IQR) in milliseconds."""
+    for _ in range(warmup):
+        fn()
+
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+
+    samples *= 1e3
+    p25, p50, p75, p99 = np.percentile(samples, [25, 50, 75, 99])
+    return {
+        "p50_ms": float(p50),
+        "p99_ms": float(p99),
+        "mean_ms": float(samples.mean()),
+        # interquartile range of the samples, a yardstick for run-to-run noise of the p50
+        "iqr_ms": float(p75 - p25),
+    }
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]):
+    print(f"\n{title}")
+    print(f"{'case':<40} {'p50 (ms)':>10} {'p99 (ms)':>10} {'mean (ms)':>10}")
+    for name, stats in rows.items():
+        print(
+            f"{name:<40} {stats['p50_ms']:>10.3f} {stats['p99_ms']:>10.3f} {stats['mean_ms']:>10.3f}"
+        )
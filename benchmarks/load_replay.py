@@ -0,0 +1,129 @@
+"""
+Load-test the client/server stack offline by replaying games.
+
+    $ cd serving && gunicorn --bind 127.0.0.1:5000 app:app    # the real serving app
+    $ python benchmarks/load_replay.py --games 32 --speed 120 --ip 127.0.0.1 --port 5000
+
+Recorded play-by-play payloads (from a GameStore directory with ``--store``,
+or synthetic games by default) are served by a local ReplayServer that reveals
+plays progressively at ``--speed`` x real time. Every game is followed by
+MultiGameTracker, exactly as live games would be, and scored through
+ServingClient against the serving app.
+
+Reported latencies run from the moment a shot becomes visible on the stub
+server to the moment its score is available to the client, so they include
+the wait for the next poll (at most ``--poll-interval``).
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from common import add_to_path
+
+add_to_path("ift6758")
+add_to_path("ift6758", "ift6758", "client")
+from game_client import GameClient  # noqa: E402
+from game_store import GameStore  # noqa: E402
+from http_fetcher import HttpFetcher  # noqa: E402
+from multi_game_tracker import MultiGameTracker  # noqa: E402
+from serving_client import ServingClient  # noqa: E402
+from ift6758.data.replay import ReplayServer  # noqa: E402
+from ift6758.data.synthetic import make_game_payload, season_game_ids  # noqa: E402
+
+
+def load_payloads(args):
+    if args.store:
+        store = GameStore(args.store)
+        game_ids = store.game_ids(state="final")[: args.games]
+        return {game_id: store.get(game_id) for game_id in game_ids}
+    return {game_id: make_game_payload(game_id) for game_id in season_game_ids(2023, args.games)}
+
+
+def percentiles(samples) -> str:
+    if not samples:
+        return "no samples"
+    ms = np.asarray(samples) * 1e3
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return f"p50 {p50:8.1f} ms   p90 {p90:8.1f} ms   p99 {p99:8.1f} ms   max {ms.max():8.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded games against the serving app")
+    parser.add_argument("--ip", default="127.0.0.1", help="serving app host")
+    parser.add_argument("--port", type=int, default=5000, help="serving app port")
+    parser.add_argument("--games", type=int, default=16, help="number of simultaneous games")
+    parser.add_argument("--store", help="GameStore directory with recorded final games")
+    parser.add_argument("--speed", type=float, default=120, help="replay speed, x real time")
+    parser.add_argument("--stagger", type=float, default=0.0, help="seconds between game starts")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between polls of a game")
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--batch-window", type=float, default=0.05, help="seconds to gather shots per predict call")
+    parser.add_argument("--duration", type=float, default=None, help="stop after N seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    payloads = load_payloads(args)
+    server = ReplayServer(payloads, speed=args.speed, stagger=args.stagger).start()
+
+    serving_client = ServingClient(ip=args.ip, port=args.port, pool_maxsize=args.max_concurrency)
+    predict_latency = []
+    predict = serving_client.predict
+
+    def timed_predict(X, *a, **kw):
+        start = time.perf_counter()
+        try:
+            return predict(X, *a, **kw)
+        finally:
+            predict_latency.append(time.perf_counter() - start)
+
+    serving_client.predict = timed_predict
+
+    end_to_end = []
+    scored_events = set()
+
+    def on_predictions(game_id, scored, removed):
+        now = time.monotonic()
+        for event_id in scored["event_id"].tolist() if not scored.empty else []:
+            key = (game_id, str(event_id))
+            revealed = server.reveal_time(game_id, event_id)
+            # edited shots are scored again; only the first score counts
+            if key not in scored_events and revealed is not None:
+                scored_events.add(key)
+                end_to_end.append(now - revealed)
+
+    game_client = GameClient(
+        serving_client=serving_client,
+        fetcher=HttpFetcher(pool_maxsize=args.max_concurrency),
+        base_url=server.base_url,
+    )
+    tracker = MultiGameTracker(
+        game_client,
+        max_concurrency=args.max_concurrency,
+        live_interval=args.poll_interval,
+        intermission_interval=args.poll_interval,
+        pregame_interval=args.poll_interval,
+        batch_window=args.batch_window,
+        on_predictions=on_predictions,
+    )
+
+    start = time.perf_counter()
+    try:
+        asyncio.run(tracker.run(game_ids=list(payloads), duration=args.duration))
+    finally:
+        elapsed = time.perf_counter() - start
+        server.stop()
+        serving_client.close()
+
+    print(f"\nReplayed {len(payloads)} games at {args.speed:g}x in {elapsed:.1f} s")
+    print(f"upstream requests     {server.requests} ({server.not_modified} answered 304)")
+    print(f"predict calls         {len(predict_latency)}")
+    print(f"shots scored          {len(end_to_end)} ({len(end_to_end) / elapsed:.1f} shots/s)")
+    print(f"shot -> score         {percentiles(end_to_end)}")
+    print(f"predict request       {percentiles(predict_latency)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Benchmark suite with saved baselines.
+
+    $ python benchmarks/suite.py --compare reference      # fail if a case got slower
+    $ python benchmarks/suite.py --save mybox             # record benchmarks/baselines/mybox.json
+    $ python benchmarks/suite.py --only features json     # run some groups only
+
+Groups:
+    features   build_features on whole games of several sizes, and parsing
+               their play-by-play (json.loads vs play_by_play's selective parse)
+    json       ServingClient's /predict body encoding and the server's decoding
+    flask      /predict through the Flask test client (JSON and float matrix bodies),
+               and the optional prediction cache against the scorer it wraps
+    gunicorn   ServingClient.predict against the app running under gunicorn
+
+Payloads are synthetic (``ift6758.data.synthetic``) unless ``--fixtures``
+points at a GameStore directory of recorded games. Every case is timed with
+``common.time_calls``. ``--compare`` flags a case as SLOWER when its p50 is more
+than ``--threshold`` times the baseline's *and* above it by more than the noise:
+``--min-delta`` ms, or three times the baseline's interquartile range if that is
+larger. Sub-millisecond cases routinely move by 1.5x between identical runs.
+
+The exit status is 1 if any case is slower, and 2 if a group could not run or
+crashed, or if a baseline case is missing from the run. Use ``--only`` to leave
+out groups on purpose.
+
+``baselines/reference.json`` is committed; its ``meta`` records the machine
+and library versions it was measured with. Timings only compare on similar
+hardware: on another machine, save a baseline of the tree you start from and
+compare your changes against that.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from common import ROOT, add_to_path, time_calls
+
+add_to_path("ift6758")
+add_to_path("ift6758", "ift6758", "client")
+add_to_path("serving")
+from features import build_features  # noqa: E402
+from play_by_play import BACKEND, parse_play_by_play  # noqa: E402
+from ift6758.data.synthetic import make_game_payload  # noqa: E402
+
+BASELINES = ROOT / "benchmarks" / "baselines"
+GAME_SIZES = [100, 300, 1000]
+ROW_SIZES = [1, 100, 10_000]
+FEATURES = ["distance", "angle_from_net"]
+
+Cases = Dict[str, Callable[[], object]]
+
+
+def synthetic_shots(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "distance": rng.integers(0, 190, size=n).astype(np.float64),
+        "angle_from_net": rng.uniform(0, 180, size=n),
+    })
+
+
+def train_model(workdir: Path) -> Path:
+    """Fit the distance model and seed an artifact store with it, as the app expects."""
+    from artifact_store import ArtifactStore
+
+    X = synthetic_shots(5_000, seed=1)
+    y = np.random.default_rng(2).random(len(X)) < 1 / (1 + np.exp(0.08 * X["distance"] - 1))
+    model = LogisticRegression().fit(X[["distance"]].to_numpy(), y)
+    path = workdir / "model.pkl"
+    joblib.dump(model, path)
+    store_dir = workdir / "model_store"
+    ArtifactStore(store_dir).put("logreg_distance_model", "latest", path)
+    return store_dir
+
+
+def feature_cases(args) -> Cases:
+    cases = {}
+    games = {f"synthetic {n} plays": make_game_payload("2023020001", n_plays=n) for n in GAME_SIZES}
+    if args.fixtures:
+        from game_store import GameStore
+
+        store = GameStore(args.fixtures)
+        for game_id in store.game_ids(state="final")[:3]:
+            games[f"fixture {game_id}"] = store.get(game_id)
+
+    for name, payload in games.items():
+        plays = payload["plays"]
+        cases[f"build_features {name}"] = lambda plays=plays, payload=payload: build_features(plays, payload)
+
+        # a game in progress: final games are always parsed whole
+        body = json.dumps(dict(payload, gameState="LIVE")).encode()
+        cases[f"parse json {name}"] = lambda body=body: json.loads(body)
+        cases[f"parse {BACKEND} sel {name}"] = lambda body=body: parse_play_by_play(body)
+    return cases
+
+
+def json_cases(args) -> Cases:
+    from inference import features_to_array
+    from payload import decode_features
+    from serving_client import _encode_float_matrix
+
+    cases = {}
+    for n in ROW_SIZES:
+        X = synthetic_shots(n)
+        body = json.dumps(X.to_dict(orient="records"))
+        matrix = _encode_float_matrix(X)
+        cases[f"json encode n={n}"] = lambda X=X: json.dumps(X.to_dict(orient="records"))
+        cases[f"json decode n={n}"] = lambda body=body: features_to_array(json.loads(body), FEATURES)
+        cases[f"matrix encode n={n}"] = lambda X=X: _encode_float_matrix(X)
+        cases[f"matrix decode n={n}"] = lambda matrix=matrix: decode_features(
+            matrix, "application/x-float-matrix", FEATURES
+        )
+    return cases
+
+
+def flask_cases(args) -> Cases:
+    import app as serving_app
+    from payload import FLOAT_MATRIX
+    from prediction_cache import PredictionCache
+    from serving_client import _encode_float_matrix
+
+    client = serving_app.app.test_client()
+    client.get("/capabilities")  # runs before_first_request: loads the default model
+    if serving_app.app.active is None:
+        raise RuntimeError("the serving app could not load its default model")
+
+    active = serving_app.app.active
+    prediction_cache = PredictionCache(max_entries=100_000)
+
+    cases = {}
+    for n in ROW_SIZES:
+        X = synthetic_shots(n)[["distance"]]
+        records = X.to_dict(orient="records")
+        matrix = _encode_float_matrix(X)
+        cases[f"/predict json n={n}"] = lambda records=records: client.post("/predict", json=records)
+        cases[f"/predict matrix n={n}"] = lambda matrix=matrix: client.post(
+            "/predict", data=matrix, headers={"Content-Type": FLOAT_MATRIX, "Accept": FLOAT_MATRIX}
+        )
+        # warm cache: after the first call every row is a hit (unless the batch is too large to cache)
+        X = X.to_numpy(dtype=np.float64)
+        cases[f"scorer n={n}"] = lambda X=X: active.scorer(X)
+        cases[f"prediction cache n={n}"] = lambda X=X: prediction_cache.score(
+            (active.name, active.version), active.scorer, X
+        )
+    return cases
+
+
+def gunicorn_cases(args, env: Dict[str, str]) -> Cases:
+    from serving_client import ServingClient
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}",
+         "--worker-class", "gthread", "--threads", "4", "app:app"],
+        cwd=ROOT / "serving",
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    args.cleanup.append(proc.terminate)
+
+    cases = {}
+    for wire_format in ("json", "matrix"):
+        client = ServingClient(ip="127.0.0.1", port=port, features=["distance"], wire_format=wire_format)
+        args.cleanup.append(client.close)
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                client.predict(synthetic_shots(1))
+                break
+            except Exception:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("gunicorn did not come up")
+                time.sleep(0.2)
+
+        for n in ROW_SIZES:
+            X = synthetic_shots(n)
+            cases[f"gunicorn {wire_format} n={n}"] = lambda X=X, client=client: client.predict(X)
+    return cases
+
+
+def run_group(group: str, args, env: Dict[str, str]) -> Dict[str, Dict[str, float]]:
+    """Time every case of ``group``; any error (setup or a case) propagates to the caller."""
+    if group == "features":
+        cases = feature_cases(args)
+    elif group == "json":
+        cases = json_cases(args)
+    elif group == "flask":
+        cases = flask_cases(args)
+    else:
+        cases = gunicorn_cases(args, env)
+
+    results = {}
+    for name, fn in cases.items():
+        repeat = args.repeat if "10000" not in name and "1000 plays" not in name else max(args.repeat // 10, 10)
+        results[name] = time_calls(fn, repeat=repeat)
+    return results
+
+
+def is_slower(stats: Dict, base: Dict, threshold: float, min_delta_ms: float) -> bool:
+    """A p50 both ``threshold`` times the baseline's and further above it than run-to-run noise."""
+    delta = stats["p50_ms"] - base["p50_ms"]
+    noise = max(min_delta_ms, 3 * base.get("iqr_ms", 0.0))
+    return stats["p50_ms"] > threshold * base["p50_ms"] and delta > noise
+
+
+def print_results(results: Dict, baseline: Dict | None, threshold: float, min_delta_ms: float) -> List[str]:
+    """Print every case, with its ratio to the baseline; return the regressed ones."""
+    regressed = []
+    header = f"{'case':<40} {'p50 (ms)':>10} {'p99 (ms)':>10} {'mean (ms)':>10}"
+    print(f"\n{header}" + (f" {'vs base':>9}" if baseline else ""))
+    for name, stats in results.items():
+        line = f"{name:<40} {stats['p50_ms']:>10.3f} {stats['p99_ms']:>10.3f} {stats['mean_ms']:>10.3f}"
+        base = (baseline or {}).get(name)
+        if base:
+            ratio = stats["p50_ms"] / base["p50_ms"] if base["p50_ms"] else float("inf")
+            flag = "  SLOWER" if is_slower(stats, base, threshold, min_delta_ms) else ""
+            line += f" {ratio:>8.2f}x{flag}"
+            if flag:
+                regressed.append(name)
+        print(line)
+    return regressed
+
+
+def machine_meta() -> Dict:
+    """What a baseline was measured on, to tell whether timings can be compared."""
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "json_backend": BACKEND,
+        "commit": commit,
+        "created": time.time(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--only", nargs="*", choices=["features", "json", "flask", "gunicorn"])
+    parser.add_argument("--fixtures", help="GameStore directory with recorded games")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--save", metavar="NAME", help="save results as baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=1.25, help="p50 ratio counted as a regression")
+    parser.add_argument(
+        "--min-delta", type=float, default=0.25, metavar="MS",
+        help="smallest p50 increase (ms) counted as a regression, whatever the ratio",
+    )
+    args = parser.parse_args()
+    args.cleanup = []
+
+    groups = args.only or ["features", "json", "flask", "gunicorn"]
+    with tempfile.TemporaryDirectory() as workdir:
+        # the app reads its config from the environment at import time; the prediction
+        # cache stays off (its default) so /predict cases measure the inference path
+        env = {
+            "ARTIFACT_STORE": str(train_model(Path(workdir))),
+            "FLASK_LOG": str(Path(workdir) / "flask.log"),
+            "PREDICTION_CACHE_SIZE": "0",
+        }
+        os.environ.update(env)
+
+        results = {}
+        group_cases = {}
+        failed = []
+        try:
+            for group in groups:
+                try:
+                    group_results = run_group(group, args, env)
+                    results.update(group_results)
+                    group_cases[group] = list(group_results)
+                except Exception as e:
+                    print(f"\n[{group}] FAILED: {type(e).__name__}: {e}")
+                    failed.append(group)
+        finally:
+            for cleanup in args.cleanup:
+                cleanup()
+
+    baseline = None
+    missing = []
+    if args.compare:
+        with open(BASELINES / f"{args.compare}.json") as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        # a case of the baseline that did not run is a failure too, unless its group was left out
+        missing = [
+            name for group in group_cases for name in saved.get("groups", {}).get(group, [])
+            if name not in results
+        ]
+    regressed = print_results(results, baseline, args.threshold, args.min_delta)
+
+    if args.save and failed:
+        print(f"\nNot saving baseline {args.save}: some groups did not run")
+    elif args.save:
+        BASELINES.mkdir(exist_ok=True)
+        meta = machine_meta()
+        with open(BASELINES / f"{args.save}.json", "w") as f:
+            json.dump({"meta": meta, "groups": group_cases, "results": results}, f, indent=2)
+        print(f"\nSaved baseline {args.save}")
+
+    if failed or missing:
+        if failed:
+            print(f"\nGroup(s) that did not run: {', '.join(failed)}")
+        if missing:
+            print(f"\n{len(missing)} case(s) of baseline {args.compare} did not run: {', '.join(missing)}")
+        sys.exit(2)
+    if regressed:
+        print(f"\n{len(regressed)} case(s) slower than baseline {args.compare}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
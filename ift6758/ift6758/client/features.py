@@ -35,84 +35,110 @@ def get_mapping_tables(payload: dict) -> tuple[dict, dict]:
 
 
 
-def build_features(events: List[Dict], payload: Dict) -> pd.DataFrame:
+def build_features(
+    events: List[Dict], payload: Dict, mapping_tables: Tuple[dict, dict] | None = None
+) -> pd.DataFrame:
     """
     Feature function used by GameClient.step.
 
+    Fields are first pulled out of the plays into column lists/arrays, then
+    distance, angle, strength and empty-net flags are computed in bulk.
+
     Args:
         events: list of *new* play dicts (subset of payload["plays"])
         payload: full game JSON
+        mapping_tables: get_mapping_tables(payload), if the caller already has it
 
     Returns:
         DataFrame with all model features + meta.
     """
-    player_name, team_name = get_mapping_tables(payload)
+    if mapping_tables is None:
+        mapping_tables = get_mapping_tables(payload)
+    player_name, team_name = mapping_tables
 
     home_id = payload.get("homeTeam", {}).get("id")
     away_id = payload.get("awayTeam", {}).get("id")
 
-    plays = []
-    for play in events:
-        event = play.get("typeDescKey")
-        if event not in EVENT_MAP:
-            continue
+    shots = [play for play in events if play.get("typeDescKey") in EVENT_MAP]
+    n = len(shots)
+    if n == 0:
+        return pd.DataFrame()
 
-        d = play.get("details", {}) or {}
-        shooter_id = d.get("scoringPlayerId") or d.get("shootingPlayerId")
-        goalie_id = d.get("goalieInNetId")
-        team_id = d.get("eventOwnerTeamId")
+    details = [play.get("details", {}) or {} for play in shots]
+    periods = [play.get("periodDescriptor", {}) for play in shots]
 
-        team_side = "HOME" if team_id == home_id else "AWAY"
+    event_type = [EVENT_MAP[play["typeDescKey"]] for play in shots]
+    team_id = [d.get("eventOwnerTeamId") for d in details]
+    shooter_id = [d.get("scoringPlayerId") or d.get("shootingPlayerId") for d in details]
+    goalie_id = [d.get("goalieInNetId") for d in details]
 
-        x = d.get("xCoord")
-        y = d.get("yCoord")
+    teams = [team_name.get(t, {}) for t in team_id]
+    is_home = np.array([t == home_id for t in team_id], dtype=bool)
+    team_side = np.where(is_home, "HOME", "AWAY").tolist()
 
-        is_goal = 1 if EVENT_MAP.get(event) == "GOAL" else 0
+    # goalieInNetId is absent (None -> NaN) or 0 when the net is empty
+    goalie = np.array([g if g is not None else np.nan for g in goalie_id], dtype=np.float64)
+    empty_net = ((goalie == 0) | np.isnan(goalie)).astype(np.int64)
+    is_goal = (np.array(event_type) == "GOAL").astype(np.int64)
 
-        empty_net = int(goalie_id is None or goalie_id == 0)
+    # strength: decode each distinct situationCode once, then broadcast
+    codes = [play.get("situationCode") or "" for play in shots]
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    decoded = np.array([parse_strength(c) for c in unique_codes], dtype=object)
+    strength = decoded[inverse.reshape(-1)].tolist()
 
-        distance = None
-        angle_from_net = None
-        if x is not None and y is not None:
-            distance = int(
-                np.sqrt((89 - abs(x))**2 + (0 - abs(y))**2).round()
-            )
-            angle_from_net = float(
-                np.degrees(np.arctan2(abs(y), 89 - x))
-            )
+    x = np.array([d.get("xCoord") for d in details], dtype=np.float64)
+    y = np.array([d.get("yCoord") for d in details], dtype=np.float64)
+    has_xy = ~(np.isnan(x) | np.isnan(y))
+    abs_y = np.abs(y)
+    distance = np.sqrt((89 - np.abs(x)) ** 2 + abs_y ** 2).round()
+    angle_from_net = np.degrees(np.arctan2(abs_y, 89 - x))
 
-        plays.append(
-            {
-                "event_id": play.get("eventId"),
+    home_team = team_name.get(home_id, {}).get("name")
+    away_team = team_name.get(away_id, {}).get("name")
 
-                "period": play.get("periodDescriptor", {}).get("number"),
-                "period_type": play.get("periodDescriptor", {}).get("periodType"),
-                "time_remaining": play.get("timeRemaining"),
+    return pd.DataFrame(
+        {
+            "event_id": [play.get("eventId") for play in shots],
 
-                "strength": parse_strength(play.get("situationCode")),
-                "event_type": EVENT_MAP.get(event),
+            "period": [p.get("number") for p in periods],
+            "period_type": [p.get("periodType") for p in periods],
+            "time_remaining": [play.get("timeRemaining") for play in shots],
 
-                "team_id": team_id,
-                "team_name": team_name.get(team_id, {}).get("name"),
-                "team_abbr": team_name.get(team_id, {}).get("abbrev"),
-                "team_side": team_side,
-                "is_home": (team_side == "HOME"),
+            "strength": strength,
+            "event_type": event_type,
 
-                "shooter_id": shooter_id,
-                "shooter_name": player_name.get(shooter_id),
-                "goalie_id": goalie_id,
-                "goalie_name": player_name.get(goalie_id),
+            "team_id": team_id,
+            "team_name": [t.get("name") for t in teams],
+            "team_abbr": [t.get("abbrev") for t in teams],
+            "team_side": team_side,
+            "is_home": is_home,
 
-                "shot_type": d.get("shotType"),
+            "shooter_id": shooter_id,
+            "shooter_name": [player_name.get(s) for s in shooter_id],
+            "goalie_id": goalie_id,
+            "goalie_name": [player_name.get(g) for g in goalie_id],
 
-                "home_team": team_name.get(home_id, {}).get("name"),
-                "away_team": team_name.get(away_id, {}).get("name"),
+            "shot_type": [d.get("shotType") for d in details],
 
-                "is_goal": is_goal,
-                "empty_net": empty_net,
-                "distance": distance,
-                "angle_from_net": angle_from_net,
-            }
-        )
+            "home_team": [home_team] * n,
+            "away_team": [away_team] * n,
+
+            "is_goal": is_goal,
+            "empty_net": empty_net,
+            "distance": _optional_column(distance, has_xy, np.int64),
+            "angle_from_net": _optional_column(angle_from_net, has_xy, np.float64),
+        }
+    )
 
-    return pd.DataFrame(plays)
+
+def _optional_column(values: np.ndarray, present: np.ndarray, dtype) -> np.ndarray | list:
+    """
+    Give a computed column the dtype pandas would infer from the per-shot
+    values, where shots without coordinates hold None.
+    """
+    if present.all():
+        return values.astype(dtype)
+    if not present.any():
+        return [None] * len(values)
+    return np.where(present, values, np.nan)
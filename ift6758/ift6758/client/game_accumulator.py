@@ -0,0 +1,136 @@
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .shot_records import SHOT_DTYPE, frame_from_records, records_from_frame
+except ImportError:  # loaded as a top-level module, e.g. by `streamlit run streamlit_app.py`
+    from shot_records import SHOT_DTYPE, frame_from_records, records_from_frame
+
+
+class GameAccumulator:
+    """
+    Running xG and goal totals for one game, plus an append-only buffer of
+    its scored shots as compact ``SHOT_DTYPE`` records (see shot_records).
+
+    ``update`` costs O(new and removed events), amortized: new rows are
+    appended to the buffer (which doubles when full) and added to the totals.
+    Re-scored events (same event_id) and removed events are found through an
+    event_id -> row index, retracted from the totals and tombstoned in the
+    buffer rather than rewriting it. The display DataFrame is only rebuilt
+    when the buffer changed since the last call to ``to_frame``, which costs
+    O(rows). Once the game is final, ``finalize`` drops the tombstones, spare
+    capacity and the index (rebuilt if the game ever changes again).
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.records = np.zeros(capacity, dtype=SHOT_DTYPE)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.n_rows = 0
+        self.final = False
+        # event_id -> row of its live record
+        self.row_of: Dict[int, int] | None = {}
+
+        self.xg_home = 0.0
+        self.xg_away = 0.0
+        self.score_home = 0
+        self.score_away = 0
+        self.meta: dict = {}
+
+        self.version = 0
+        self._frame = pd.DataFrame()
+        self._frame_version = 0
+
+    @property
+    def empty(self) -> bool:
+        return not self.alive[:self.n_rows].any()
+
+    @property
+    def nbytes(self) -> int:
+        return self.records.nbytes + self.alive.nbytes
+
+    def update(self, new_df: pd.DataFrame, removed_event_ids: Iterable = ()):
+        """Fold one ping worth of scored shots (and deletions) into the state."""
+        self._retract([int(event_id) for event_id in removed_event_ids])
+
+        if new_df.empty:
+            return
+
+        new = records_from_frame(new_df)
+        event_ids = new["event_id"].tolist()
+        self._retract(event_ids)
+
+        start, end = self.n_rows, self.n_rows + len(new)
+        if end > len(self.records):
+            self._resize(max(end, 2 * len(self.records)))
+        self.records[start:end] = new
+        self.n_rows = end
+        # an event twice in one batch: only its last row is live
+        row_of = self._index()
+        for row, event_id in enumerate(event_ids, start):
+            row_of[event_id] = row
+        rows = np.fromiter(sorted(row_of[event_id] for event_id in set(event_ids)), dtype=np.int64)
+        self.alive[rows] = True
+        self._add(rows, 1)
+        self.version += 1
+
+        last = new_df.iloc[-1]
+        self.meta = {
+            "home_team": last.get("home_team", "Home team"),
+            "away_team": last.get("away_team", "Away team"),
+            "period": last.get("period", "?"),
+            "time_remaining": last.get("time_remaining", "??:??"),
+        }
+
+    def finalize(self):
+        """The game is over: keep only the live rows, in a buffer of exactly their size."""
+        live = self.alive[:self.n_rows]
+        self.records = self.records[:self.n_rows][live].copy()
+        self.n_rows = len(self.records)
+        self.alive = np.ones(self.n_rows, dtype=bool)
+        self.row_of = None
+        self.final = True
+
+    def totals(self) -> Tuple[float, float, int, int]:
+        return self.xg_home, self.xg_away, self.score_home, self.score_away
+
+    def to_frame(self) -> pd.DataFrame:
+        """The live rows as a DataFrame, rebuilt only after the buffer changed."""
+        if self._frame_version != self.version:
+            live = self.records[:self.n_rows][self.alive[:self.n_rows]]
+            self._frame = frame_from_records(live, self.meta.get("home_team"), self.meta.get("away_team"))
+            self._frame_version = self.version
+        return self._frame
+
+    def _resize(self, capacity: int):
+        records = np.zeros(capacity, dtype=SHOT_DTYPE)
+        records[:self.n_rows] = self.records[:self.n_rows]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.n_rows] = self.alive[:self.n_rows]
+        self.records, self.alive = records, alive
+
+    def _index(self) -> Dict[int, int]:
+        if self.row_of is None:
+            live = np.flatnonzero(self.alive[:self.n_rows])
+            self.row_of = dict(zip(self.records["event_id"][live].tolist(), live.tolist()))
+        return self.row_of
+
+    def _retract(self, event_ids):
+        row_of = self._index()
+        rows = [row_of.pop(event_id) for event_id in event_ids if event_id in row_of]
+        if not rows:
+            return
+        rows = np.asarray(rows, dtype=np.int64)
+        self._add(rows, -1)
+        self.alive[rows] = False
+        self.version += 1
+
+    def _add(self, rows, sign: int):
+        shots = self.records[rows]
+        prob = np.nan_to_num(shots["goal_prob"].astype(np.float64))
+        home = shots["is_home"]
+        self.xg_home += sign * float(prob[home].sum())
+        self.xg_away += sign * float(prob[~home].sum())
+        self.score_home += sign * int(shots["is_goal"][home].sum())
+        self.score_away += sign * int(shots["is_goal"][~home].sum())
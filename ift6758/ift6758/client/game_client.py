@@ -1,83 +1,378 @@
 import logging
-from typing import Callable, List, Dict
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, List, Dict, NamedTuple, Tuple
 
-import requests
 import pandas as pd
 
-from serving_client import ServingClient
-from features import build_features
+try:
+    from .serving_client import ServingClient
+    from .features import EVENT_MAP, build_features, get_mapping_tables
+    from .http_fetcher import FetchResult, HttpFetcher
+    from .game_store import FINAL_STATES, GameStore
+    from .play_by_play import parse_play_by_play
+except ImportError:  # loaded as a top-level module, e.g. by `streamlit run streamlit_app.py`
+    from serving_client import ServingClient
+    from features import EVENT_MAP, build_features, get_mapping_tables
+    from http_fetcher import FetchResult, HttpFetcher
+    from game_store import FINAL_STATES, GameStore
+    from play_by_play import parse_play_by_play
 
 logger = logging.getLogger(__name__)
 
 
+class GameState:
+    """What GameClient remembers about one game between pings."""
+
+    def __init__(self):
+        # non-incremental mode: ids of every play already scored
+        self.seen_event_ids = set()
+
+        # incremental mode: id and content hash of every processed play, in feed order,
+        # as int64 arrays (8 bytes a play instead of two Python objects)
+        self.event_ids = array("q")
+        self.signatures = array("q")
+        self.pings = 0
+        # ETag/Last-Modified of the last payload processed
+        self.validator = None
+        self.final = False
+
+        # player/team lookups, rebuilt only when the roster or teams change
+        self.mapping_key = None
+        self.mapping_tables = None
+
+    def finish(self):
+        """The game is final and fully processed: drop everything but the flag and validator."""
+        self.final = True
+        self.seen_event_ids = set()
+        self.event_ids = array("q")
+        self.signatures = array("q")
+        self.mapping_key = None
+        self.mapping_tables = None
+
+
+class EventDiff(NamedTuple):
+    events: List[Dict]           # new or edited plays to score
+    removed_event_ids: List[str]  # previously processed plays gone from the feed
+    event_ids: array
+    signatures: array
+
+
+class GamePoll(NamedTuple):
+    game_id: str
+    features: pd.DataFrame        # build_features output for new/edited shots
+    removed_event_ids: List[str]
+    payload: Dict | None          # None when the feed was not modified
+    diff: EventDiff | None
+    validator: str | None
+
+
+def _play_signature(play: Dict) -> int:
+    """Cheap content hash of the play fields that feed into build_features."""
+    details = play.get("details") or {}
+    period = play.get("periodDescriptor") or {}
+    key = (
+        play.get("typeDescKey"),
+        play.get("situationCode"),
+        play.get("timeRemaining"),
+        period.get("number"),
+        period.get("periodType"),
+    )
+    try:
+        return hash((key, tuple(sorted(details.items()))))
+    except TypeError:
+        return hash((key, repr(sorted(details.items()))))
+
+
 class GameClient:
 
     def __init__(
         self,
         serving_client: ServingClient,
+        incremental: bool = True,
+        recheck_window: int = 25,
+        full_check_every: int = 20,
+        fetcher: HttpFetcher = None,
+        base_url: str = "https://api-web.nhle.com/v1",
+        store: GameStore = None,
+        selective_parse: bool = True,
+        max_games: int = 64,
     ):
+        """
+        All NHL API calls go through ``fetcher`` (a pooled keep-alive session with
+        conditional requests); ``base_url`` can point at a local stub server.
+
+        With a ``store``, games that reached a final state are saved to it and
+        afterwards read from disk rather than fetched; their stored shot table
+        replaces ``build_features`` when a game is processed from scratch.
 
+        With ``selective_parse`` the play-by-play is parsed by
+        ``parse_play_by_play``: payloads of games in progress only hold the
+        plays build_features scores, so the other plays are never diffed either.
+
+        State is kept for the ``max_games`` most recently polled games. Once a
+        game is final and committed its state shrinks to a flag: later polls
+        return nothing without fetching. A game evicted while in progress is
+        processed from scratch when polled again (its shots come back with the
+        same event ids). Several threads may share one client as long as each
+        game is polled by a single one at a time: the LRU of games is locked,
+        the state of a game is not.
+
+        In incremental mode each ping only looks at the plays appended since the
+        last one, plus the last ``recheck_window`` processed plays (where the
+        NHL feed usually revises events). Every ``full_check_every`` pings, or
+        whenever earlier plays were inserted or deleted, all plays are compared
+        against what was processed so edits anywhere are still caught.
+        """
         self.serving_client = serving_client
+        self.fetcher = fetcher or HttpFetcher()
+        self.base_url = base_url.rstrip("/")
         self.feature_fn = build_features
-        self.seen_event_ids = set()
+        self.incremental = incremental
+        self.recheck_window = recheck_window
+        self.full_check_every = full_check_every
+        self.store = store
+        self.parse = parse_play_by_play if selective_parse else None
+
+        self.max_games = max_games
+        self.games: "OrderedDict[str, GameState]" = OrderedDict()
+        # guards ``games``: lookups reorder it and inserts evict from it
+        self._games_lock = threading.Lock()
+        # ids of processed plays that disappeared from the feed on the last step
+        self.last_removed_event_ids: List[str] = []
+
+    def reset(self, game_id: str = None):
+        """Forget what was processed for ``game_id`` (or every game)."""
+        with self._games_lock:
+            if game_id is None:
+                self.games.clear()
+            else:
+                self.games.pop(str(game_id), None)
+
+    def _state(self, game_id: str) -> GameState:
+        game_id = str(game_id)
+        with self._games_lock:
+            state = self.games.get(game_id)
+            if state is None:
+                state = self.games[game_id] = GameState()
+                while len(self.games) > self.max_games:
+                    self.games.popitem(last=False)
+            else:
+                self.games.move_to_end(game_id)
+            return state
+
+    def is_final(self, game_id: str) -> bool:
+        """Whether ``game_id`` was processed up to its final state."""
+        with self._games_lock:
+            state = self.games.get(str(game_id))
+        return state is not None and state.final
 
     def fetch_game_data(self, game_id: str) -> Dict:
 
-        url = f"https://api-web.nhle.com/v1/gamecenter/{game_id}/play-by-play"
+        return self._fetch_game(game_id).payload
+
+    def _fetch_game(self, game_id: str) -> FetchResult:
+
+        url = self._game_url(game_id)
         logger.info(f"Fetching game data for game_id={game_id} from {url}")
 
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        return resp.json()
+        return self.fetcher.get_json(url, parse=self.parse)
+
+    def _game_url(self, game_id: str) -> str:
+        return f"{self.base_url}/gamecenter/{game_id}/play-by-play"
 
     def _extract_all_events(self, data: Dict) -> List[Dict]:
 
         return data.get("plays", [])
 
-    def _get_event_id(self, event: Dict, fallback_idx: int) -> str:
+    def _get_event_id(self, event: Dict, fallback_idx: int) -> int:
+
+        return int(event.get("eventId", fallback_idx))
 
-        return str(event.get("eventId", fallback_idx))
+    def get_new_events(self, data: Dict, game_id: str = None) -> List[Dict]:
 
-    def get_new_events(self, data: Dict) -> List[Dict]:
+        game_id = data.get("id") if game_id is None else game_id
+        return self._diff_events(self._state(game_id), data).events
 
+    def _diff_events(self, state: GameState, data: Dict) -> EventDiff:
         all_events = self._extract_all_events(data)
-        new_events = []
+
+        if not self.incremental:
+            new_events = [
+                ev for idx, ev in enumerate(all_events)
+                if self._get_event_id(ev, idx) not in state.seen_event_ids
+            ]
+            logger.info(f"Found {len(new_events)} new events")
+            return EventDiff(new_events, [], [], [])
+
+        n_done = len(state.event_ids)
+        # the feed only grew at the end if the last processed play is still in place
+        appended_only = len(all_events) >= n_done and (
+            n_done == 0 or self._get_event_id(all_events[n_done - 1], n_done - 1) == state.event_ids[-1]
+        )
+        full_check = self.full_check_every > 0 and (state.pings + 1) % self.full_check_every == 0
+
+        if appended_only and not full_check:
+            diff = self._diff_tail(state, all_events, max(0, n_done - self.recheck_window))
+        else:
+            diff = self._diff_all(state, all_events)
+
+        logger.info(
+            f"Found {len(diff.events)} new or edited events, "
+            f"{len(diff.removed_event_ids)} removed"
+        )
+        return diff
+
+    def _diff_tail(self, state: GameState, all_events: List[Dict], start: int) -> EventDiff:
+        """Re-check processed plays from ``start`` on and take everything appended."""
+        n_done = len(state.event_ids)
+        event_ids = state.event_ids[:start]
+        signatures = state.signatures[:start]
+        events = []
+        removed = []
+
+        for idx in range(start, len(all_events)):
+            ev = all_events[idx]
+            ev_id = self._get_event_id(ev, idx)
+            sig = _play_signature(ev)
+            if idx < n_done and ev_id != state.event_ids[idx]:
+                # a play was inserted/removed inside the window
+                return self._diff_all(state, all_events)
+            if idx >= n_done or sig != state.signatures[idx]:
+                events.append(ev)
+                if idx < n_done and ev.get("typeDescKey") not in EVENT_MAP:
+                    # edited into something that is no longer a shot
+                    removed.append(str(ev_id))
+            event_ids.append(ev_id)
+            signatures.append(sig)
+
+        return EventDiff(events, removed, event_ids, signatures)
+
+    def _diff_all(self, state: GameState, all_events: List[Dict]) -> EventDiff:
+        """Compare every play against what was processed, matching by event id."""
+        processed = dict(zip(state.event_ids, state.signatures))
+        event_ids = array("q")
+        signatures = array("q")
+        events = []
+        removed = []
 
         for idx, ev in enumerate(all_events):
             ev_id = self._get_event_id(ev, idx)
-            if ev_id not in self.seen_event_ids:
-                new_events.append(ev)
+            sig = _play_signature(ev)
+            old_sig = processed.get(ev_id)
+            if old_sig != sig:
+                events.append(ev)
+                if old_sig is not None and ev.get("typeDescKey") not in EVENT_MAP:
+                    removed.append(str(ev_id))
+            event_ids.append(ev_id)
+            signatures.append(sig)
 
-        logger.info(f"Found {len(new_events)} new events")
-        return new_events
+        current = set(event_ids)
+        removed += [str(ev_id) for ev_id in state.event_ids if ev_id not in current]
+        return EventDiff(events, removed, event_ids, signatures)
 
-    def step(self, game_id: str) -> pd.DataFrame:
+    def _mapping_tables(self, state: GameState, data: Dict) -> Tuple[dict, dict]:
+        # every player id, not just the roster size: a swap keeps the size but changes the names
+        key = (
+            tuple(spot.get("playerId") for spot in data.get("rosterSpots", [])),
+            data.get("homeTeam", {}).get("id"),
+            data.get("awayTeam", {}).get("id"),
+        )
+        if state.mapping_tables is None or state.mapping_key != key:
+            state.mapping_tables = get_mapping_tables(data)
+            state.mapping_key = key
+        return state.mapping_tables
+
+    def _commit(self, state: GameState, diff: EventDiff, validator: str = None):
+        """Record a diff as processed, once its events were scored."""
+        state.pings += 1
+        state.validator = validator
+        if self.incremental:
+            state.event_ids = diff.event_ids
+            state.signatures = diff.signatures
+        else:
+            for idx, ev in enumerate(diff.events):
+                ev_id = self._get_event_id(ev, idx)
+                state.seen_event_ids.add(ev_id)
+
+    def poll(self, game_id: str) -> GamePoll:
+        """
+        Fetch a game and build features for its new or edited shots, without
+        scoring them. Pass the result to ``commit`` once they are scored.
+        """
+        state = self._state(game_id)
+        if state.final:
+            return GamePoll(str(game_id), pd.DataFrame(), [], None, None, state.validator)
+
+        entry = self.store.entry(game_id) if self.store is not None else None
+        archived = entry is not None and entry["state"] in FINAL_STATES
+        if archived:
+            result = FetchResult(None, False, f"store:{entry['digest']}")
+        else:
+            result = self._fetch_game(game_id)
+
+        if result.validator is not None and result.validator == state.validator:
+            # 304 (or same ETag): nothing changed since the last processed payload
+            logger.info("Game data not modified.")
+            return GamePoll(str(game_id), pd.DataFrame(), [], None, None, result.validator)
 
-        game_data = self.fetch_game_data(game_id)
-        new_events = self.get_new_events(game_data)
+        if archived:
+            game_data = self.store.get(game_id)
+        else:
+            game_data = result.payload
+            if self.store is not None and game_data.get("gameState") in FINAL_STATES:
+                self._archive(game_id, game_data)
+        fresh = not state.event_ids and not state.seen_event_ids
+        diff = self._diff_events(state, game_data)
 
-        if not new_events:
+        shots = self.store.shots(game_id) if archived and fresh else None
+        if not diff.events:
             logger.info("No new events to process.")
-            return pd.DataFrame()
+            X = pd.DataFrame()
+        elif shots is not None:
+            # every play is new: the stored table is exactly build_features' output
+            X = shots
+        else:
+            X = self.feature_fn(
+                diff.events, game_data, mapping_tables=self._mapping_tables(state, game_data)
+            )
+        return GamePoll(str(game_id), X, diff.removed_event_ids, game_data, diff, result.validator)
 
-        X = self.feature_fn(new_events, game_data)
+    def _archive(self, game_id: str, game_data: Dict):
+        """Save a final game to the store, with its shot table if the store keeps them."""
+        self.store.put(game_id, game_data)
+        if self.store.keep_shots:
+            self.store.put_shots(game_id, self.feature_fn(self._extract_all_events(game_data), game_data))
 
-        preds_df = self.serving_client.predict(X)
+    def commit(self, poll: GamePoll):
+        """Record a poll as processed so its events are not returned again."""
+        if poll.diff is not None:
+            state = self._state(poll.game_id)
+            self._commit(state, poll.diff, poll.validator)
+            if poll.payload.get("gameState") in FINAL_STATES:
+                state.finish()
+                # the fetcher would otherwise keep the whole final payload for revalidation
+                self.fetcher.forget(self._game_url(poll.game_id))
 
-        for idx, ev in enumerate(new_events):
-            ev_id = self._get_event_id(ev, idx)
-            self.seen_event_ids.add(ev_id)
+    def step(self, game_id: str) -> pd.DataFrame:
+
+        poll = self.poll(game_id)
+        self.last_removed_event_ids = poll.removed_event_ids
+
+        # only non-shot plays changed: nothing to score
+        preds_df = self.serving_client.predict(poll.features) if not poll.features.empty else poll.features
+
+        self.commit(poll)
 
         return preds_df
     
     # Bonus feature
     def get_live_game_ids(self) -> List[str]:
-        url = "https://api-web.nhle.com/v1/scoreboard/now"
+        url = f"{self.base_url}/scoreboard/now"
 
         try:
-            resp = requests.get(url, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
+            data = self.fetcher.get_json(url).payload
 
             games = data.get("games", [])
             live_ids = [
@@ -0,0 +1,240 @@
+"""
+Local store of NHL play-by-play payloads.
+
+    <root>/<season>/<game_id>.json.zst    raw payload, zstd (or .json.gz without zstandard)
+    <root>/<season>/<game_id>.shots.arrow shot table of a final game (Arrow IPC file)
+    <root>/index.json                     game_id -> state, file names, digest, stored_at
+
+Final games never change, so once stored they are served from disk instead of
+the NHL API. Their shot table (the ``build_features`` output for all plays)
+is kept uncompressed, so ``shots_table`` can memory-map it and ``shots`` reads
+it back without parsing the payload at all. Loose ``<game_id>.json`` or ``.json.gz`` files dropped
+into a season directory (e.g. fixtures) are indexed on first access.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATES = {"FINAL", "OFF"}
+
+
+class GameStore:
+
+    def __init__(self, root: str = "game_store", compression: str = None, keep_shots: bool = True):
+        """
+        ``compression`` is "zstd" or "gzip"; by default zstd if the zstandard
+        package is installed. ``keep_shots`` stores the shot table of final
+        games (needs pyarrow).
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression needs the zstandard package")
+        self.compression = compression
+        self.keep_shots = keep_shots and pa is not None
+        self._index_cache = (None, {})
+
+    def _season_dir(self, game_id: str) -> Path:
+        return self.root / str(game_id)[:4]
+
+    def entry(self, game_id: str) -> Optional[Dict]:
+        """Index entry of a game, or None if it is not stored."""
+        entry = self._read_index().get(str(game_id))
+        if entry is None:
+            entry = self._adopt_loose_file(str(game_id))
+        return entry
+
+    def is_final(self, game_id: str) -> bool:
+        entry = self.entry(game_id)
+        return entry is not None and entry["state"] in FINAL_STATES
+
+    def game_ids(self, state: str = None) -> List[str]:
+        """Stored game ids, optionally only those in ``state`` ("final" for any final state)."""
+        index = self._read_index()
+        if state is None:
+            return list(index)
+        wanted = FINAL_STATES if state == "final" else {state}
+        return [game_id for game_id, entry in index.items() if entry["state"] in wanted]
+
+    def get(self, game_id: str) -> Optional[Dict]:
+        """The stored payload of a game, or None."""
+        entry = self.entry(game_id)
+        if entry is None:
+            return None
+        path = self._season_dir(game_id) / entry["payload"]
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        return json.loads(self._decompress(raw, path.name))
+
+    def put(self, game_id: str, payload: Dict) -> Dict:
+        """Store a payload (replacing any earlier one) and return its index entry."""
+        game_id = str(game_id)
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        suffix = ".json.zst" if self.compression == "zstd" else ".json.gz"
+        name = f"{game_id}{suffix}"
+        self._write_file(self._season_dir(game_id) / name, self._compress(raw))
+
+        entry = {
+            "state": payload.get("gameState"),
+            "payload": name,
+            "shots": None,
+            "digest": hashlib.sha256(raw).hexdigest(),
+            "stored_at": time.time(),
+        }
+        self._update_index(game_id, entry)
+        return entry
+
+    def put_shots(self, game_id: str, shots: pd.DataFrame):
+        """Store the shot table of a stored game as an Arrow IPC file."""
+        game_id = str(game_id)
+        table = pa.Table.from_pandas(shots, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        name = f"{game_id}.shots.arrow"
+        self._write_file(self._season_dir(game_id) / name, sink.getvalue().to_pybytes())
+
+        with self._locked():
+            index = self._read_index()
+            if game_id in index:
+                index[game_id]["shots"] = name
+                self._write_index(index)
+
+    def shots_table(self, game_id: str) -> Optional["pa.Table"]:
+        """
+        The stored shot table of a game as an Arrow table over a memory map of
+        its file (no column is copied until used), or None.
+        """
+        entry = self.entry(game_id)
+        if pa is None or entry is None or not entry.get("shots"):
+            return None
+        path = self._season_dir(game_id) / entry["shots"]
+        try:
+            # the table's buffers keep the map open for as long as they are referenced
+            return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        except FileNotFoundError:
+            return None
+
+    def shots(self, game_id: str) -> Optional[pd.DataFrame]:
+        """
+        The stored shot table of a game as a DataFrame, or None. Every column
+        is copied to the heap; use ``shots_table`` to keep them mapped.
+        """
+        table = self.shots_table(game_id)
+        return None if table is None else table.to_pandas()
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(raw)
+        return gzip.compress(raw, compresslevel=6)
+
+    @staticmethod
+    def _decompress(data: bytes, name: str) -> bytes:
+        if name.endswith(".zst"):
+            if zstandard is None:
+                raise ImportError(f"{name} is zstd-compressed; install zstandard to read it")
+            return zstandard.ZstdDecompressor().decompress(data)
+        if name.endswith(".gz"):
+            return gzip.decompress(data)
+        return data
+
+    def _adopt_loose_file(self, game_id: str) -> Optional[Dict]:
+        """Index a payload file that was put in the store by hand."""
+        for suffix in (".json", ".json.gz"):
+            path = self._season_dir(game_id) / f"{game_id}{suffix}"
+            if path.exists():
+                break
+        else:
+            return None
+        with open(path, "rb") as f:
+            raw = self._decompress(f.read(), path.name)
+        entry = {
+            "state": json.loads(raw).get("gameState"),
+            "payload": path.name,
+            "shots": None,
+            "digest": hashlib.sha256(raw).hexdigest(),
+            "stored_at": path.stat().st_mtime,
+        }
+        self._update_index(game_id, entry)
+        return entry
+
+    @staticmethod
+    def _write_file(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _update_index(self, game_id: str, entry: Dict):
+        with self._locked():
+            index = self._read_index()
+            index[game_id] = entry
+            self._write_index(index)
+
+    def _read_index(self) -> Dict:
+        # re-read only when another process (or instance) replaced it
+        try:
+            st = self.index_path.stat()
+        except FileNotFoundError:
+            return {}
+        version = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._index_cache[0] != version:
+            try:
+                with open(self.index_path) as f:
+                    self._index_cache = (version, json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                return {}
+        return self._index_cache[1]
+
+    def _write_index(self, index: Dict):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)
+        self._index_cache = (None, {})
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
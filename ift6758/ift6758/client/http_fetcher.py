@@ -0,0 +1,97 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class FetchResult(NamedTuple):
+    payload: Optional[Dict]
+    not_modified: bool
+    # ETag (or Last-Modified) of the payload; equal validators mean equal content
+    validator: Optional[str]
+
+
+class HttpFetcher:
+    """
+    JSON fetcher over one pooled keep-alive ``requests.Session``.
+
+    Responses carrying an ETag or Last-Modified header are remembered per URL
+    and revalidated with If-None-Match / If-Modified-Since, so an unchanged
+    resource costs a 304 with no body.
+
+    ``parse`` turns the response body into the payload instead of
+    ``resp.json()``, e.g. play_by_play.parse_play_by_play. Payloads are
+    remembered per (url, parse), so callers parsing a URL differently never
+    get each other's payloads.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session = None,
+        timeout: float = 15,
+        pool_maxsize: int = 10,
+        max_retries: int = 2,
+        max_cached: int = 64,
+    ):
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=max_retries
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+
+        self.timeout = timeout
+        self.max_cached = max_cached
+        # url -> (etag, last_modified, payload)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_json(self, url: str, parse: Callable[[bytes], Dict] = None) -> FetchResult:
+        key = url if parse is None else (url, parse)
+        headers = {}
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        resp = self.session.get(url, headers=headers, timeout=self.timeout)
+
+        if resp.status_code == 304 and cached is not None:
+            logger.info(f"Not modified: {url}")
+            etag, last_modified, payload = cached
+            return FetchResult(payload, True, etag or last_modified)
+
+        resp.raise_for_status()
+        payload = resp.json() if parse is None else parse(resp.content)
+
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        with self._lock:
+            if etag or last_modified:
+                self._cache[key] = (etag, last_modified, payload)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.pop(key, None)
+
+        return FetchResult(payload, False, etag or last_modified)
+
+    def forget(self, url: str):
+        """Drop the remembered payloads of ``url``, however they were parsed."""
+        with self._lock:
+            for key in [k for k in self._cache if k == url or (isinstance(k, tuple) and k[0] == url)]:
+                del self._cache[key]
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,197 @@
+"""
+Track every live NHL game from one process.
+
+    $ python multi_game_tracker.py --ip 127.0.0.1 --port 5000
+
+Live games are discovered with ``GameClient.get_live_game_ids``. Each game is
+polled by its own asyncio task, with at most ``max_concurrency`` fetches in
+flight. The polling interval adapts to the game state: fast while the puck is
+in play, slower during intermissions and before puck drop, and a game stops
+being polled once it is final. New shots from all games are scored together
+in batched ``ServingClient.predict`` calls.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from serving_client import ServingClient
+from game_client import GameClient, GamePoll
+from game_store import FINAL_STATES
+from http_fetcher import HttpFetcher
+
+logger = logging.getLogger(__name__)
+
+PREGAME_STATES = {"FUT", "PRE"}
+
+
+class MultiGameTracker:
+
+    def __init__(
+        self,
+        game_client: GameClient,
+        serving_client: ServingClient = None,
+        max_concurrency: int = 8,
+        live_interval: float = 10,
+        intermission_interval: float = 60,
+        pregame_interval: float = 120,
+        discover_interval: float = 300,
+        batch_window: float = 0.25,
+        on_predictions: Callable[[str, pd.DataFrame, List[str]], None] = None,
+    ):
+        """
+        ``on_predictions(game_id, scored_df, removed_event_ids)`` is called for
+        every game poll that produced new scores or removed events; by default
+        the counts are logged.
+        """
+        self.game_client = game_client
+        self.serving_client = serving_client or game_client.serving_client
+        self.max_concurrency = max_concurrency
+        self.live_interval = live_interval
+        self.intermission_interval = intermission_interval
+        self.pregame_interval = pregame_interval
+        self.discover_interval = discover_interval
+        self.batch_window = batch_window
+        self.on_predictions = on_predictions or self._log_predictions
+
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # last gameState seen per game, kept while the feed answers 304
+        self.game_states: Dict[str, str] = {}
+
+    async def run(self, game_ids: List[str] = None, duration: float = None):
+        """
+        Track ``game_ids``, or every live game (re-discovered every
+        ``discover_interval`` seconds) if none are given. Returns once all games
+        are final or after ``duration`` seconds.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        scorer = asyncio.create_task(self._score_loop())
+        deadline = None if duration is None else time.monotonic() + duration
+
+        try:
+            while True:
+                ids = game_ids if game_ids is not None else await asyncio.to_thread(
+                    self.game_client.get_live_game_ids
+                )
+                for game_id in ids:
+                    if game_id not in self.tasks:
+                        logger.info(f"Start tracking game {game_id}")
+                        self.tasks[game_id] = asyncio.create_task(self._track_game(game_id))
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                if game_ids is not None:
+                    if self.tasks:
+                        await asyncio.wait(list(self.tasks.values()), timeout=remaining)
+                    break
+                await asyncio.sleep(
+                    self.discover_interval if remaining is None else min(self.discover_interval, remaining)
+                )
+        finally:
+            for task in self.tasks.values():
+                task.cancel()
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+            scorer.cancel()
+            await asyncio.gather(scorer, return_exceptions=True)
+            self.tasks.clear()
+
+    def next_interval(self, game_id: str, payload: Dict | None) -> float:
+        """Seconds until the next poll of a game, from its latest payload."""
+        if payload is not None:
+            self.game_states[game_id] = payload.get("gameState")
+            clock = payload.get("clock") or {}
+            if clock.get("inIntermission"):
+                return self.intermission_interval
+
+        state = self.game_states.get(game_id)
+        if state in PREGAME_STATES:
+            return self.pregame_interval
+        return self.live_interval
+
+    async def _track_game(self, game_id: str):
+        while True:
+            try:
+                async with self._semaphore:
+                    poll = await asyncio.to_thread(self.game_client.poll, game_id)
+            except Exception as e:
+                logger.error(f"Failed to poll game {game_id}: {e}")
+                await asyncio.sleep(self.live_interval)
+                continue
+
+            if poll.features.empty:
+                self.game_client.commit(poll)
+                if poll.removed_event_ids:
+                    self.on_predictions(game_id, poll.features, poll.removed_event_ids)
+            else:
+                # wait until the shots are scored before polling this game again
+                done = asyncio.get_running_loop().create_future()
+                await self._queue.put((poll, done))
+                try:
+                    await done
+                except Exception as e:
+                    logger.error(f"Failed to score game {game_id}: {e}")
+
+            interval = self.next_interval(game_id, poll.payload)
+            if self.game_states.get(game_id) in FINAL_STATES:
+                logger.info(f"Game {game_id} is final, stop tracking")
+                self.game_client.reset(game_id)
+                return
+            await asyncio.sleep(interval)
+
+    async def _score_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.batch_window)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._score_batch(batch)
+
+    async def _score_batch(self, batch: List[Tuple[GamePoll, asyncio.Future]]):
+        X = pd.concat([poll.features for poll, _ in batch], ignore_index=True)
+        try:
+            scored = await asyncio.to_thread(self.serving_client.predict, X)
+        except Exception as e:
+            for _, done in batch:
+                done.set_exception(e)
+            return
+
+        logger.info(f"Scored {len(X)} shots from {len(batch)} games in one request")
+        offset = 0
+        for poll, done in batch:
+            n = len(poll.features)
+            game_df = scored.iloc[offset:offset + n].reset_index(drop=True)
+            offset += n
+            self.game_client.commit(poll)
+            self.on_predictions(poll.game_id, game_df, poll.removed_event_ids)
+            done.set_result(None)
+
+    @staticmethod
+    def _log_predictions(game_id: str, scored: pd.DataFrame, removed: List[str]):
+        logger.info(f"Game {game_id}: {len(scored)} new scored shots, {len(removed)} removed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track all live NHL games")
+    parser.add_argument("--ip", default="127.0.0.1", help="serving app host")
+    parser.add_argument("--port", type=int, default=5000, help="serving app port")
+    parser.add_argument("--games", nargs="*", help="game ids to track instead of live games")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=None, help="stop after N seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    serving_client = ServingClient(ip=args.ip, port=args.port, pool_maxsize=args.max_concurrency)
+    game_client = GameClient(
+        serving_client=serving_client, fetcher=HttpFetcher(pool_maxsize=args.max_concurrency)
+    )
+    tracker = MultiGameTracker(game_client, max_concurrency=args.max_concurrency)
+    asyncio.run(tracker.run(game_ids=args.games, duration=args.duration))
+
+
+if __name__ == "__main__":
+    main()
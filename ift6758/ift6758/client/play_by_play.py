@@ -0,0 +1,94 @@
+"""
+Selective parsing of NHL play-by-play responses.
+
+Feature extraction only looks at goals and shots on goal (``EVENT_MAP``),
+the roster and the team headers, yet a full ``resp.json()`` builds a Python
+object for every faceoff, hit and stoppage of the game. ``parse_play_by_play``
+keeps every top-level field (roster, teams, state, clock: all small) but only
+the plays that build_features uses.
+
+With pysimdjson installed the document is parsed into simdjson's own buffers
+and only the kept plays become Python objects; otherwise the body is parsed
+in full with orjson (or json) and the other plays are dropped right away.
+Final games are returned whole: they are parsed once, and GameClient may
+archive them.
+"""
+import json
+import threading
+from typing import Collection, Dict
+
+try:
+    from .features import EVENT_MAP
+    from .game_store import FINAL_STATES
+except ImportError:  # loaded as a top-level module, e.g. by `streamlit run streamlit_app.py`
+    from features import EVENT_MAP
+    from game_store import FINAL_STATES
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "simdjson" if simdjson is not None else "orjson" if orjson is not None else "json"
+
+# a simdjson parser is reused between documents, but not shared between threads
+_local = threading.local()
+
+
+def loads(body: bytes):
+    """Full parse with the fastest parser available for whole documents."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def parse_play_by_play(body: bytes, event_types: Collection[str] = EVENT_MAP) -> Dict:
+    """
+    A play-by-play payload whose ``plays`` only holds plays with a
+    ``typeDescKey`` in ``event_types``, in feed order.
+    """
+    if simdjson is None:
+        payload = loads(body)
+        if payload.get("gameState") not in FINAL_STATES:
+            payload["plays"] = [play for play in payload.get("plays", []) if play.get("typeDescKey") in event_types]
+        return payload
+
+    doc = _parse(body)
+    if not isinstance(doc, simdjson.Object) or doc.get("gameState") in FINAL_STATES:
+        del doc
+        return loads(body)
+
+    payload = {}
+    for key in doc.keys():
+        if key != "plays":
+            payload[key] = _materialize(doc[key])
+    plays = doc.get("plays")
+    payload["plays"] = [] if plays is None else [
+        play.as_dict() for play in plays if play.get("typeDescKey") in event_types
+    ]
+    return payload
+
+
+def _parse(body: bytes):
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = simdjson.Parser()
+    try:
+        return parser.parse(body)
+    except RuntimeError:
+        # objects of the previous document are still referenced (e.g. by a traceback)
+        parser = _local.parser = simdjson.Parser()
+        return parser.parse(body)
+
+
+def _materialize(value):
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    return value
@@ -1,13 +1,162 @@
 import json
+import queue
+import struct
+import threading
+import time
+from concurrent.futures import Future
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 import logging
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 logger = logging.getLogger(__name__)
 
+# /predict body formats, see serving/payload.py for the matrix layout
+JSON = "application/json"
+FLOAT_MATRIX = "application/x-float-matrix"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+_MATRIX_MAGIC = b"XGM1"
+_MATRIX_HEADER = struct.Struct("<4sBIH")
+# how long download_registry_model waits for the server to pull and publish a model
+SWITCH_TIMEOUT = 300
+
+
+def _encode_float_matrix(X: pd.DataFrame, width: int = 8) -> bytes:
+    """Matrix body of ``X``; ``width=4`` sends float32, which rounds values past ~7 digits."""
+    values = np.ascontiguousarray(X.to_numpy(dtype=f"<f{width}", na_value=np.nan))
+    parts = [_MATRIX_HEADER.pack(_MATRIX_MAGIC, width, values.shape[0], values.shape[1])]
+    for name in X.columns:
+        encoded = str(name).encode("utf-8")
+        parts.append(bytes([len(encoded)]) + encoded)
+    parts.append(values.tobytes())
+    return b"".join(parts)
+
+
+def _decode_float_matrix_column(body: bytes) -> np.ndarray:
+    magic, width, n_rows, n_cols = _MATRIX_HEADER.unpack_from(body, 0)
+    if magic != _MATRIX_MAGIC or n_cols != 1:
+        raise ValueError("Malformed float matrix response")
+    offset = _MATRIX_HEADER.size + 1 + body[_MATRIX_HEADER.size]
+    return np.frombuffer(body, dtype=f"<f{width}", count=n_rows, offset=offset)
+
+
+def _encode_arrow_stream(X: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(X, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class _PredictBatcher:
+    """
+    Background thread merging predict calls that arrive within ``window``
+    seconds of each other into one /predict request per model, then handing
+    each caller its slice of the predictions.
+    """
+
+    def __init__(self, score_fn, window: float, max_rows: int):
+        self._score = score_fn
+        self.window = window
+        self.max_rows = max_rows
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="predict-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, X_payload: pd.DataFrame, model: str, version: str) -> Future:
+        future = Future()
+        self._queue.put((X_payload, model, version, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            rows = len(item[0])
+            deadline = time.monotonic() + self.window
+            while rows < self.max_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._flush(batch)
+                    return
+                batch.append(item)
+                rows += len(item[0])
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        groups = {}
+        for item in batch:
+            X_payload, model, version, _ = item
+            groups.setdefault((model, version, tuple(X_payload.columns)), []).append(item)
+
+        for (model, version, _), items in groups.items():
+            try:
+                X = pd.concat([X_payload for X_payload, *_ in items], ignore_index=True)
+                preds = np.asarray(self._score(X, model, version))
+            except Exception as e:
+                for *_, future in items:
+                    future.set_exception(e)
+                continue
+
+            logger.debug(f"Scored {len(items)} batched predict calls ({len(X)} rows) in one request")
+            offset = 0
+            for X_payload, _, _, future in items:
+                future.set_result(preds[offset:offset + len(X_payload)])
+                offset += len(X_payload)
+
 
 class ServingClient:
-    def __init__(self, ip: str = "127.0.0.1", port: int = 5000, features=None):
+    def __init__(
+        self,
+        ip: str = "127.0.0.1",
+        port: int = 5000,
+        features=None,
+        wire_format: str = "auto",
+        timeout: float | tuple = (3.05, 30),
+        max_retries: int = 2,
+        pool_maxsize: int = 10,
+        batch_window_ms: float = 0,
+        max_batch_rows: int = 50_000,
+        matrix_float32: bool = False,
+    ):
+        """
+        ``wire_format`` picks the /predict body format: "json", "matrix" (float64
+        matrix), "arrow", or "auto" to use the most compact format the server
+        advertises on /capabilities. Anything the server does not support falls
+        back to JSON. ``matrix_float32`` halves matrix bodies by sending float32,
+        which rounds the features; scores can then differ from the JSON path.
+
+        Requests share one keep-alive session; ``timeout`` is passed to every
+        call. Failed connections are retried ``max_retries`` times for every
+        call, GET requests also on read errors and 502/503/504. POSTs are not
+        resent after a read error, which would start a second model switch or
+        score a large batch again; /predict alone is retried on 502/503, which
+        mean the app never got the request.
+
+        With ``batch_window_ms > 0``, predict calls made from several threads or
+        games within that window are merged into a single request.
+        """
         self.base_url = f"http://{ip}:{port}"
         logger.info(f"Initializing client; base URL: {self.base_url}")
 
@@ -15,7 +164,90 @@ class ServingClient:
             features = ["distance", "angle_from_net"]
         self.features = features
 
-    def predict(self, X: pd.DataFrame) -> pd.DataFrame:
+        self.wire_format = wire_format
+        self._matrix_width = 4 if matrix_float32 else 8
+        self._request_format = None
+
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        # urllib3 retries connection errors whatever the method; read errors and statuses only for GET
+        retries = Retry(
+            total=max_retries,
+            backoff_factor=0.1,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._batcher = None
+        if batch_window_ms > 0:
+            self._batcher = _PredictBatcher(self._score, batch_window_ms / 1000, max_batch_rows)
+
+    def close(self):
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+        self.session.close()
+
+    def request_format(self) -> str:
+        """Content type used for /predict, negotiated with the server on first use."""
+        if self._request_format is None:
+            self._request_format = self._negotiate_format()
+        return self._request_format
+
+    def _negotiate_format(self) -> str:
+        if self.wire_format == "json":
+            return JSON
+
+        try:
+            resp = self.session.get(f"{self.base_url}/capabilities", timeout=self.timeout)
+            resp.raise_for_status()
+            supported = resp.json().get("predict_formats", [])
+        except (requests.RequestException, ValueError) as e:
+            logger.info(f"Server does not advertise binary formats ({e}); using JSON")
+            return JSON
+
+        wanted = {
+            "auto": [ARROW_STREAM, FLOAT_MATRIX],
+            "arrow": [ARROW_STREAM],
+            "matrix": [FLOAT_MATRIX],
+        }.get(self.wire_format, [])
+        for fmt in wanted:
+            if fmt in supported and (fmt != ARROW_STREAM or pa is not None):
+                logger.info(f"Using {fmt} for /predict")
+                return fmt
+        return JSON
+
+    def _post_predict(self, X_payload: pd.DataFrame, params: dict, fmt: str) -> requests.Response:
+        url = f"{self.base_url}/predict"
+        if fmt == JSON:
+            kwargs = {"json": X_payload.to_dict(orient="records")}
+        else:
+            if fmt == ARROW_STREAM:
+                body = _encode_arrow_stream(X_payload)
+            else:
+                body = _encode_float_matrix(X_payload, self._matrix_width)
+            kwargs = {"data": body, "headers": {"Content-Type": fmt, "Accept": f"{FLOAT_MATRIX}, {JSON};q=0.5"}}
+
+        # 502/503 come from gunicorn or a proxy before the app saw the request, so it is safe
+        # to send again; after a read timeout or a 504 the app may still be scoring it
+        for attempt in range(self.max_retries + 1):
+            resp = self.session.post(url, params=params, timeout=self.timeout, **kwargs)
+            if resp.status_code not in (502, 503) or attempt == self.max_retries:
+                return resp
+            logger.warning(f"/predict answered {resp.status_code}, retrying")
+            time.sleep(0.1 * 2 ** attempt)
+
+    def predict(self, X: pd.DataFrame, model: str = None, version: str = None) -> pd.DataFrame:
+        """
+        Score X with the serving app. ``model``/``version`` pick a specific cached
+        model on the server for this call only; by default the server's current
+        model is used.
+        """
         if self.features is not None:
             missing = [f for f in self.features if f not in X.columns]
             if missing:
@@ -24,27 +256,81 @@ class ServingClient:
         else:
             X_payload = X.copy()
 
-        url = f"{self.base_url}/predict"
-        payload = X_payload.to_dict(orient="records")
+        if self._batcher is not None:
+            preds = self._batcher.submit(X_payload, model, version).result()
+        else:
+            preds = self._score(X_payload, model, version)
 
+        X_with_pred = X.copy()
+        X_with_pred["goal_prob"] = preds
+        return X_with_pred
+
+    def _score(self, X_payload: pd.DataFrame, model: str = None, version: str = None):
+        params = {}
+        if model is not None:
+            params["model"] = model
+            if version is not None:
+                params["version"] = version
+
+        fmt = self.request_format()
         try:
-            resp = requests.post(url, json=payload)
+            resp = self._post_predict(X_payload, params, fmt)
+            if resp.status_code == 415 and fmt != JSON:
+                # server no longer accepts the negotiated format
+                logger.warning(f"Server rejected {fmt}; falling back to JSON")
+                self._request_format = JSON
+                resp = self._post_predict(X_payload, params, JSON)
             resp.raise_for_status()
         except requests.RequestException as e:
             logger.error(f"Error while calling prediction service: {e}")
             raise
 
-        data = resp.json()  
-        preds = data["predictions"]
+        if resp.headers.get("Content-Type", "").startswith(FLOAT_MATRIX):
+            return _decode_float_matrix_column(resp.content)
+        data = resp.json()
+        return data["predictions"]
 
-        X_with_pred = X.copy()
-        X_with_pred["goal_prob"] = preds
-        return X_with_pred
+    def stream_game(self, game_id: str, last_event_id: int = 0):
+        """
+        Follow /games/<game_id>/stream, yielding ``(event_id, kind, data)`` for
+        each server-sent event ("shots", "removed" or "final") until the game is
+        final or the connection closes.
+        """
+        url = f"{self.base_url}/games/{game_id}/stream"
+        headers = {"Accept": "text/event-stream"}
+        if last_event_id:
+            headers["Last-Event-ID"] = str(last_event_id)
+        connect = self.timeout[0] if isinstance(self.timeout, tuple) else self.timeout
+
+        with self.session.get(url, headers=headers, stream=True, timeout=(connect, None)) as resp:
+            resp.raise_for_status()
+            event_id, kind, data = None, "message", []
+            for line in resp.iter_lines(decode_unicode=True):
+                if line:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "id":
+                        event_id = int(value)
+                    elif field == "event":
+                        kind = value
+                    elif field == "data":
+                        data.append(value)
+                    continue
+                if data:
+                    yield event_id, kind, json.loads("\n".join(data))
+                    if kind == "final":
+                        return
+                event_id, kind, data = None, "message", []
 
-    def logs(self) -> dict:
+    def logs(self, tail: int = None, offset: int = None, limit: int = None) -> dict:
+        """
+        Server log lines: the last ``tail`` lines (the server's default page
+        when nothing is given), or ``limit`` lines from line ``offset``.
+        """
         url = f"{self.base_url}/logs"
+        params = {k: v for k, v in {"tail": tail, "offset": offset, "limit": limit}.items() if v is not None}
         try:
-            resp = requests.get(url)
+            resp = self.session.get(url, params=params, timeout=self.timeout)
             resp.raise_for_status()
         except requests.RequestException as e:
             logger.error(f"Error while fetching logs: {e}")
@@ -58,7 +344,12 @@ class ServingClient:
                 return {"logs": resp.text}
         return {"logs": resp.text}
 
-    def download_registry_model(self, workspace: str, model: str, version: str) -> dict:
+    def download_registry_model(self, workspace: str, model: str, version: str, poll_interval: float = 0.5) -> dict:
+        """
+        Switch the server's default model and wait until the switch job is done
+        (every server worker then serves the new model). Returns the finished
+        job; raises RuntimeError if the job failed or did not finish in time.
+        """
         url = f"{self.base_url}/download_registry_model"
         payload = {
             "workspace": workspace,
@@ -67,13 +358,31 @@ class ServingClient:
         }
 
         try:
-            resp = requests.post(url, json=payload)
+            resp = self.session.post(url, json=payload, timeout=self.timeout)
             resp.raise_for_status()
         except requests.RequestException as e:
             logger.error(f"Error while downloading registry model: {e}")
             raise
 
         try:
-            return resp.json()
+            job = resp.json()
         except json.JSONDecodeError:
             return {"raw_response": resp.text}
+
+        # the server may be pulling the artifact from wandb
+        deadline = time.monotonic() + SWITCH_TIMEOUT
+        while job.get("status") in ("pending", "running"):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Model switch {job['job_id']} still {job['status']} after {SWITCH_TIMEOUT}s")
+            time.sleep(poll_interval)
+            try:
+                resp = self.session.get(f"{self.base_url}{job['status_url']}", timeout=self.timeout)
+                resp.raise_for_status()
+            except requests.RequestException as e:
+                logger.error(f"Error while polling model switch {job['job_id']}: {e}")
+                raise
+            job = {**resp.json(), "status_url": job["status_url"]}
+
+        if job.get("status") == "error":
+            raise RuntimeError(f"Model switch failed: {job.get('message')}")
+        return job
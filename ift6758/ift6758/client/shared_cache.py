@@ -0,0 +1,119 @@
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable
+
+try:
+    from .http_fetcher import FetchResult, HttpFetcher
+except ImportError:  # loaded as a top-level module, e.g. by `streamlit run streamlit_app.py`
+    from http_fetcher import FetchResult, HttpFetcher
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Thread-safe TTL cache with request coalescing: while a value is being
+    fetched, other callers asking for the same key wait for that fetch
+    instead of starting their own.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], object], ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            with self._lock:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def forget(self, match: Callable[[Hashable], bool]):
+        """Drop the entries whose key satisfies ``match``; fetches in flight are left alone."""
+        with self._lock:
+            for key in [k for k in self._entries if match(k)]:
+                del self._entries[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+
+class CachedFetcher:
+    """
+    Drop-in for HttpFetcher that serves recent responses from a shared
+    TTLCache, so many sessions polling the same game or the scoreboard cost
+    one upstream request per TTL. Payloads are shared: treat them as
+    read-only.
+    """
+
+    def __init__(self, fetcher: HttpFetcher = None, ttl: float = 5.0, scoreboard_ttl: float = 30.0):
+        self.fetcher = fetcher or HttpFetcher()
+        self.scoreboard_ttl = scoreboard_ttl
+        self.cache = TTLCache(ttl)
+        self._fetch_ids = itertools.count(1)
+
+    def get_json(self, url: str, parse: Callable[[bytes], Dict] = None) -> FetchResult:
+        ttl = self.scoreboard_ttl if "/scoreboard/" in url else None
+        key = url if parse is None else (url, parse)
+        return self.cache.get_or_fetch(key, lambda: self._fetch(url, parse), ttl=ttl)
+
+    def _fetch(self, url: str, parse: Callable[[bytes], Dict] = None) -> FetchResult:
+        result = self.fetcher.get_json(url, parse=parse)
+        if result.validator is None:
+            # no ETag upstream: still let each GameClient recognise a payload it already processed
+            result = result._replace(validator=f"fetch-{next(self._fetch_ids)}")
+        return result
+
+    def forget(self, url: str):
+        """Drop ``url`` from the shared cache and from the underlying fetcher."""
+        self.cache.forget(lambda key: key == url or (isinstance(key, tuple) and key[0] == url))
+        self.fetcher.forget(url)
+
+    def close(self):
+        self.fetcher.close()
@@ -0,0 +1,164 @@
+"""
+Compact in-memory shot records.
+
+A scored shot (``build_features`` row plus ``goal_prob``) is one row of
+``SHOT_DTYPE``, a NumPy structured dtype of about 40 bytes. Nothing in a row
+is a Python object:
+
+* players and teams are kept by NHL id; their names live in process-wide
+  tables (``PLAYERS``, ``TEAMS``) shared by every game and session;
+* short labels (strength, event type, shot type, period type, clock) are
+  interned in ``LABELS``, one table per column, and stored as codes;
+* the home/away team names are the same for every shot of a game and are not
+  stored per row at all.
+
+``records_from_frame`` and ``frame_from_records`` convert to and from the
+DataFrame layout; columns outside ``SHOT_COLUMNS`` are not kept.
+"""
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+SHOT_DTYPE = np.dtype([
+    ("event_id", "<i8"),
+    ("period", "u1"),
+    ("period_type", "<u2"),
+    ("time_remaining", "<u2"),
+    ("strength", "<u2"),
+    ("event_type", "<u2"),
+    ("shot_type", "<u2"),
+    ("team_id", "<i4"),
+    ("is_home", "?"),
+    ("is_goal", "u1"),
+    ("empty_net", "u1"),
+    ("shooter_id", "<i4"),
+    ("goalie_id", "<i4"),
+    ("distance", "<f4"),
+    ("angle_from_net", "<f4"),
+    ("goal_prob", "<f4"),
+])
+
+# build_features' columns plus the model output, in display order
+SHOT_COLUMNS = [
+    "event_id", "period", "period_type", "time_remaining", "strength", "event_type",
+    "team_id", "team_name", "team_abbr", "team_side", "is_home",
+    "shooter_id", "shooter_name", "goalie_id", "goalie_name", "shot_type",
+    "home_team", "away_team", "is_goal", "empty_net", "distance", "angle_from_net", "goal_prob",
+]
+LABEL_COLUMNS = ["period_type", "time_remaining", "strength", "event_type", "shot_type"]
+
+# ids of missing players/teams; goalie_id 0 (empty net) is a real value
+MISSING_ID = -1
+
+
+class Interner:
+    """Thread-safe string <-> code table; code 0 stands for None."""
+
+    def __init__(self):
+        self.values: List[str | None] = [None]
+        self._codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def codes(self, values) -> np.ndarray:
+        out = np.empty(len(values), dtype=np.uint32)
+        with self._lock:
+            for i, value in enumerate(values):
+                if value is None or pd.isna(value):
+                    out[i] = 0
+                    continue
+                code = self._codes.get(value)
+                if code is None:
+                    code = self._codes[value] = len(self.values)
+                    self.values.append(value)
+                out[i] = code
+        return out
+
+    def categorical(self, codes: np.ndarray) -> pd.Categorical:
+        # categories are every value interned so far; unused ones cost nothing per row
+        with self._lock:
+            categories = self.values[1:]
+        return pd.Categorical.from_codes(codes.astype(np.int64) - 1, categories=categories)
+
+
+LABELS = {name: Interner() for name in LABEL_COLUMNS}
+PLAYERS: Dict[int, str] = {}
+TEAMS: Dict[int, Tuple[str, str]] = {}
+
+
+def _ids(values) -> np.ndarray:
+    ids = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+    return np.where(np.isnan(ids), MISSING_ID, ids).astype(np.int64)
+
+
+def _remember_names(ids: np.ndarray, names, table: Dict):
+    for i, name in zip(ids.tolist(), names):
+        if i != MISSING_ID and i not in table and name is not None and not pd.isna(name):
+            table[i] = name
+
+
+def records_from_frame(df: pd.DataFrame) -> np.ndarray:
+    """Scored shots (build_features output with ``goal_prob``) as SHOT_DTYPE rows."""
+    n = len(df)
+    records = np.zeros(n, dtype=SHOT_DTYPE)
+
+    def column(name, default=None):
+        return df[name].tolist() if name in df.columns else [default] * n
+
+    records["event_id"] = _ids(column("event_id"))
+    records["period"] = np.clip(_ids(column("period")), 0, 255)
+    for name in LABEL_COLUMNS:
+        records[name] = LABELS[name].codes(column(name))
+
+    team_id = _ids(column("team_id"))
+    records["team_id"] = team_id
+    for i, name, abbrev in zip(team_id.tolist(), column("team_name"), column("team_abbr")):
+        if i != MISSING_ID and i not in TEAMS:
+            TEAMS[i] = (name, abbrev)
+
+    records["shooter_id"] = _ids(column("shooter_id"))
+    records["goalie_id"] = _ids(column("goalie_id"))
+    _remember_names(records["shooter_id"], column("shooter_name"), PLAYERS)
+    _remember_names(records["goalie_id"], column("goalie_name"), PLAYERS)
+
+    records["is_home"] = np.asarray(column("is_home", False), dtype=bool)
+    records["is_goal"] = np.asarray(column("is_goal", 0), dtype=np.uint8)
+    records["empty_net"] = np.asarray(column("empty_net", 0), dtype=np.uint8)
+    for name in ("distance", "angle_from_net", "goal_prob"):
+        records[name] = pd.to_numeric(pd.Series(column(name)), errors="coerce").to_numpy(dtype=np.float32)
+    return records
+
+
+def frame_from_records(records: np.ndarray, home_team: str = None, away_team: str = None) -> pd.DataFrame:
+    """The display DataFrame of SHOT_DTYPE rows, labels as categoricals."""
+    n = len(records)
+    team_id = records["team_id"].tolist()
+    teams = [TEAMS.get(i, (None, None)) for i in team_id]
+
+    def ids(name):
+        return pd.arrays.IntegerArray(records[name].astype(np.int64), records[name] == MISSING_ID)
+
+    data = {
+        "event_id": records["event_id"],
+        "period": records["period"].astype(np.int64),
+        "team_id": ids("team_id"),
+        "team_name": [t[0] for t in teams],
+        "team_abbr": [t[1] for t in teams],
+        "team_side": pd.Categorical(np.where(records["is_home"], "HOME", "AWAY"), categories=["HOME", "AWAY"]),
+        "is_home": records["is_home"],
+        "shooter_id": ids("shooter_id"),
+        "shooter_name": [PLAYERS.get(i) for i in records["shooter_id"].tolist()],
+        "goalie_id": ids("goalie_id"),
+        "goalie_name": [PLAYERS.get(i) for i in records["goalie_id"].tolist()],
+        "home_team": [home_team] * n,
+        "away_team": [away_team] * n,
+        "is_goal": records["is_goal"].astype(np.int64),
+        "empty_net": records["empty_net"].astype(np.int64),
+        "distance": records["distance"],
+        "angle_from_net": records["angle_from_net"],
+        "goal_prob": records["goal_prob"],
+    }
+    for name in LABEL_COLUMNS:
+        data[name] = LABELS[name].categorical(records[name])
+    return pd.DataFrame({name: data[name] for name in SHOT_COLUMNS})
@@ -1,62 +1,67 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 
 from serving_client import ServingClient
 from game_client import GameClient
+from game_accumulator import GameAccumulator
+from http_fetcher import HttpFetcher
+from shared_cache import CachedFetcher
+from game_store import GameStore
+
+
+@st.cache_resource
+def shared_serving_client() -> ServingClient:
+    """One ServingClient (and connection pool) for every session of this process."""
+    return ServingClient(
+        ip="serving",
+        port=5000,
+    )
+
+
+@st.cache_resource
+def shared_fetcher() -> CachedFetcher:
+    """
+    NHL API responses shared by every session: the scoreboard and each game's
+    play-by-play are fetched at most once per TTL, and concurrent sessions
+    wait on the same in-flight request.
+    """
+    return CachedFetcher(HttpFetcher(pool_maxsize=20), ttl=5.0, scoreboard_ttl=30.0)
+
+
+@st.cache_resource
+def shared_game_store() -> GameStore:
+    """Finished games kept on disk, so a restarted app does not download them again."""
+    return GameStore(os.environ.get("GAME_STORE_DIR", "game_store"))
+
 
 def init_state():
     if "serving_client" not in st.session_state:
-        st.session_state.serving_client = ServingClient(
-            ip="serving",
-            port=5000,
-        )
+        st.session_state.serving_client = shared_serving_client()
 
     if "game_client" not in st.session_state:
         st.session_state.game_client = GameClient(
-            serving_client=st.session_state.serving_client
+            serving_client=st.session_state.serving_client,
+            fetcher=shared_fetcher(),
+            store=shared_game_store(),
         )
 
     if "current_game_id" not in st.session_state:
         st.session_state.current_game_id = None
-    if "events_df" not in st.session_state:
-        st.session_state.events_df = pd.DataFrame()
-    if "game_meta" not in st.session_state:
-        st.session_state.game_meta = {}
+    if "game" not in st.session_state:
+        st.session_state.game = GameAccumulator()
     if "last_ping_text" not in st.session_state:
         st.session_state.last_ping_text = "(never)"
 
 
 def reset_game_state():
-    st.session_state.events_df = pd.DataFrame()
-    st.session_state.game_meta = {}
+    st.session_state.game = GameAccumulator()
     st.session_state.last_ping_text = "(never)"
 
     if "game_client" in st.session_state:
-        st.session_state.game_client.seen_event_ids.clear()
-
-
-def compute_xg_and_score(df: pd.DataFrame):
-    """
-    Compute xG and actual score for home/away.
-
-    Assumes df has:
-      - 'is_home'   : True for home-team events, False for away-team
-      - 'is_goal'   : 1 if goal, 0 otherwise
-      - 'goal_prob' : model's predicted probability from ServingClient
-    """
-    if df.empty:
-        return 0.0, 0.0, 0, 0
-
-    home_df = df[df["is_home"] == True]
-    away_df = df[df["is_home"] == False]
-
-    xg_home = float(home_df["goal_prob"].sum())
-    xg_away = float(away_df["goal_prob"].sum())
-    score_home = int(home_df["is_goal"].sum())
-    score_away = int(away_df["is_goal"].sum())
-
-    return xg_home, xg_away, score_home, score_away
+        st.session_state.game_client.reset()
 
 
 init_state()
@@ -127,11 +132,9 @@ with st.sidebar:
             )
             st.success(f"Model loaded: {resp}")
             # Reset seen events since we need to recompute predictions with the new model
-            st.session_state.game_client.seen_event_ids.clear()
-            st.session_state.events_df = pd.DataFrame()
-            st.session_state.last_idx = None
+            st.session_state.game_client.reset()
+            st.session_state.game = GameAccumulator()
             st.session_state.last_ping_text = "(model changed)"
-            st.session_state.game_meta = {}
         except Exception as e:
             st.error(f"Error downloading model: {e}")
 
@@ -153,21 +156,12 @@ with st.container():
         else:
             try:
                 new_df = st.session_state.game_client.step(game_id)
+                removed = st.session_state.game_client.last_removed_event_ids
 
-                if not new_df.empty:
-                    st.session_state.events_df = (
-                        pd.concat([st.session_state.events_df, new_df])
-                        .drop_duplicates(subset=["event_id"])
-                        .reset_index(drop=True)
-                    )
-
-                    last_row = new_df.iloc[-1]
-                    st.session_state.game_meta = {
-                        "home_team": last_row.get("home_team", "Home team"),
-                        "away_team": last_row.get("away_team", "Away team"),
-                        "period": last_row.get("period", "?"),
-                        "time_remaining": last_row.get("time_remaining", "??:??"),
-                    }
+                # O(new events): edited plays replace their earlier row, deleted ones are retracted
+                st.session_state.game.update(new_df, removed)
+                if st.session_state.game_client.is_final(game_id) and not st.session_state.game.final:
+                    st.session_state.game.finalize()
 
                 st.session_state.last_ping_text = "success"
 
@@ -181,15 +175,13 @@ with st.container():
 # CONTAINER 2 — Game Info + Predictions Summary
 # -------------------------------------------------------------------
 with st.container():
-    meta = st.session_state.game_meta or {}
+    meta = st.session_state.game.meta
     home_team = meta.get("home_team", "Home team")
     away_team = meta.get("away_team", "Away team")
     period = meta.get("period", "?")
     time_remaining = meta.get("time_remaining", "??:??")
 
-    xg_home, xg_away, score_home, score_away = compute_xg_and_score(
-        st.session_state.events_df
-    )
+    xg_home, xg_away, score_home, score_away = st.session_state.game.totals()
 
     st.markdown(
         f"### Game {st.session_state.current_game_id or 'N/A'}: "
@@ -237,7 +229,7 @@ with st.container():
 with st.container():
     st.markdown("### Events and Model Predictions")
 
-    if st.session_state.events_df.empty:
+    if st.session_state.game.empty:
         st.info("No shot events yet. Click **Ping game** to fetch new events.")
     else:
-        st.dataframe(st.session_state.events_df, width='stretch')
+        st.dataframe(st.session_state.game.to_frame(), width='stretch')
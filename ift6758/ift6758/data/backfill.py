@@ -0,0 +1,303 @@
+"""
+Score whole seasons of NHL shots into partitioned Parquet.
+
+    $ python -m ift6758.data.backfill --season 2023 --cache-dir data/raw --out data/xg \\
+          --model-path logreg_distance_model_latest.pkl --features distance
+
+Play-by-play payloads come from the ``GameStore`` at ``--cache-dir`` (loose
+``<season>/<game_id>.json`` files are picked up too); games missing from it
+are fetched from the NHL API and stored, unless ``--offline`` is given.
+Features are built in a process pool, or read from the store's shot table when
+a game has one. Shots are scored in batches of about ``--batch-rows`` rows,
+either in-process with a pickled model or through the serving app
+(``--ip``/``--port``), and every batch is written as
+``<out>/season=<season>/part-<n>.parquet``.
+
+``<out>/_manifest.json`` records which games are in which part file. A rerun
+skips those games, so an interrupted backfill resumes where it stopped. At
+most ``--max-pending`` games are held in memory besides the current batch.
+"""
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from ift6758.client.features import build_features
+from ift6758.client.game_store import FINAL_STATES, GameStore
+
+logger = logging.getLogger(__name__)
+
+NHL_API_BASE_URL = "https://api-web.nhle.com/v1"
+MANIFEST = "_manifest.json"
+
+# one HttpFetcher per worker process, created on first fetch
+_fetcher = None
+
+
+def game_id_range(season: int, first: int = 1, last: int = 1312, game_type: int = 2) -> List[str]:
+    """Game ids ``first``..``last`` of a season, e.g. 2023020001 for the first regular-season game."""
+    return [f"{season}{game_type:02d}{number:04d}" for number in range(first, last + 1)]
+
+
+def season_of(game_id: str) -> int:
+    return int(str(game_id)[:4])
+
+
+def load_game(game_id: str, store: GameStore, offline: bool = False, base_url: str = NHL_API_BASE_URL) -> Dict | None:
+    """
+    Play-by-play of a game from the store, falling back to the API. Final
+    games fetched from the API are stored. Returns None if the game is not
+    available.
+    """
+    payload = store.get(game_id)
+    if payload is not None or offline:
+        return payload
+
+    global _fetcher
+    if _fetcher is None:
+        from ift6758.client.http_fetcher import HttpFetcher
+
+        _fetcher = HttpFetcher(pool_maxsize=1, max_cached=0)
+    try:
+        payload = _fetcher.get_json(f"{base_url}/gamecenter/{game_id}/play-by-play").payload
+    except Exception as e:
+        logger.warning(f"Could not fetch game {game_id}: {e}")
+        return None
+
+    if payload.get("gameState") in FINAL_STATES:
+        store.put(game_id, payload)
+    return payload
+
+
+def extract_game(game_id: str, store: GameStore, offline: bool = False, base_url: str = NHL_API_BASE_URL):
+    """
+    Worker task: (game_id, shot features) of a final game, or (game_id, None)
+    if the game is missing or not over yet.
+    """
+    features = store.shots(game_id)
+    if features is None:
+        payload = load_game(game_id, store, offline=offline, base_url=base_url)
+        if payload is None or payload.get("gameState") not in FINAL_STATES:
+            return game_id, None
+        features = build_features(payload.get("plays", []), payload)
+        if store.keep_shots:
+            store.put_shots(game_id, features)
+
+    if not features.empty:
+        features.insert(0, "game_id", str(game_id))
+    return game_id, features
+
+
+class Manifest:
+    """Checkpoint of a backfill: which games were written to which part file."""
+
+    def __init__(self, out_dir: Path):
+        self.path = Path(out_dir) / MANIFEST
+        self.games: Dict[str, str] = {}
+        self.parts: List[str] = []
+        if self.path.exists():
+            with open(self.path) as f:
+                data = json.load(f)
+            self.games = data.get("games", {})
+            self.parts = data.get("parts", [])
+
+    def record(self, part: str | None, game_ids: Iterable[str]):
+        """Mark ``game_ids`` done; ``part`` is None when they had no shots."""
+        if part is not None:
+            self.parts.append(part)
+        for game_id in game_ids:
+            self.games[str(game_id)] = part
+        self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"games": self.games, "parts": self.parts}, f)
+        os.replace(tmp, self.path)
+
+
+def in_process_scorer(model_path: str, features: List[str]) -> Callable[[pd.DataFrame], np.ndarray]:
+    import joblib
+
+    model = joblib.load(model_path)
+
+    def score(X: pd.DataFrame) -> np.ndarray:
+        X = X[features]
+        # models fitted on a bare array warn when given feature names
+        if getattr(model, "feature_names_in_", None) is None:
+            X = X.to_numpy(dtype=np.float64)
+        return model.predict_proba(X)[:, 1]
+
+    return score
+
+
+def serving_scorer(ip: str, port: int, features: List[str], model: str = None, version: str = None):
+    from ift6758.client.serving_client import ServingClient
+
+    client = ServingClient(ip=ip, port=port, features=features)
+    return lambda X: client.predict(X, model=model, version=version)["goal_prob"].to_numpy()
+
+
+class Backfill:
+    def __init__(
+        self,
+        out_dir: Path,
+        cache_dir: Path,
+        features: List[str],
+        score_fn: Callable[[pd.DataFrame], np.ndarray] = None,
+        workers: int = None,
+        batch_rows: int = 200_000,
+        max_pending: int = None,
+        offline: bool = False,
+        base_url: str = NHL_API_BASE_URL,
+    ):
+        """
+        ``score_fn`` maps the shots of a batch to P(goal); shots without all
+        ``features`` get NaN. Without ``score_fn`` only the features are written.
+        """
+        self.out_dir = Path(out_dir)
+        self.store = GameStore(cache_dir)
+        self.features = features
+        self.score_fn = score_fn
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_rows = batch_rows
+        self.max_pending = max_pending or 4 * self.workers
+        self.offline = offline
+        self.base_url = base_url
+
+        self.manifest = Manifest(self.out_dir)
+        self._remove_orphan_parts()
+
+    def _remove_orphan_parts(self):
+        # a part written just before a crash, but never recorded, would be duplicated on resume
+        known = set(self.manifest.parts)
+        for path in self.out_dir.glob("season=*/part-*.parquet"):
+            if str(path.relative_to(self.out_dir)) not in known:
+                logger.info(f"Removing unrecorded part {path}")
+                path.unlink()
+
+    def run(self, game_ids: Iterable[str]) -> Dict:
+        pending_ids = [str(g) for g in game_ids if str(g) not in self.manifest.games]
+        logger.info(f"{len(pending_ids)} games to backfill, {len(self.manifest.games)} already done")
+        stats = {"games": 0, "shots": 0, "skipped": 0, "parts": 0}
+
+        # per season: [(game_id, features), ...] and their row count
+        batches: Dict[int, List] = {}
+        batch_rows: Dict[int, int] = {}
+        todo = iter(pending_ids)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            in_flight = set()
+            while True:
+                # keep at most max_pending games extracted but not yet consumed
+                for game_id in todo:
+                    in_flight.add(pool.submit(extract_game, game_id, self.store, self.offline, self.base_url))
+                    if len(in_flight) >= self.max_pending:
+                        break
+                if not in_flight:
+                    break
+
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    game_id, features = future.result()
+                    if features is None:
+                        logger.warning(f"Game {game_id} is not available or not final, skipping")
+                        stats["skipped"] += 1
+                        continue
+
+                    season = season_of(game_id)
+                    batches.setdefault(season, []).append((game_id, features))
+                    batch_rows[season] = batch_rows.get(season, 0) + len(features)
+                    if batch_rows[season] >= self.batch_rows:
+                        self._flush(season, batches.pop(season), stats)
+                        batch_rows[season] = 0
+
+        for season, batch in batches.items():
+            if batch:
+                self._flush(season, batch, stats)
+        return stats
+
+    def _flush(self, season: int, batch: List, stats: Dict):
+        game_ids = [game_id for game_id, _ in batch]
+        frames = [features for _, features in batch if not features.empty]
+        shots = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+        if not shots.empty and self.score_fn is not None:
+            complete = shots[self.features].notna().all(axis=1).to_numpy()
+            goal_prob = np.full(len(shots), np.nan)
+            if complete.any():
+                goal_prob[complete] = self.score_fn(shots.loc[complete].reset_index(drop=True))
+            shots["goal_prob"] = goal_prob
+
+        part = f"season={season}/part-{len(self.manifest.parts) + 1:05d}.parquet"
+        if not shots.empty:
+            path = self.out_dir / part
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shots.to_parquet(path, index=False)
+        self.manifest.record(part if not shots.empty else None, game_ids)
+
+        stats["games"] += len(game_ids)
+        stats["shots"] += len(shots)
+        stats["parts"] += int(not shots.empty)
+        logger.info(f"Wrote {len(shots)} shots of {len(game_ids)} games to {part}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill xG for whole seasons into Parquet")
+    parser.add_argument("--season", type=int, help="season start year, e.g. 2023")
+    parser.add_argument("--first", type=int, default=1, help="first game number of the season")
+    parser.add_argument("--last", type=int, default=1312, help="last game number of the season")
+    parser.add_argument("--game-type", type=int, default=2, help="1 preseason, 2 regular, 3 playoffs")
+    parser.add_argument("--game-ids", nargs="*", help="explicit game ids instead of a season range")
+    parser.add_argument("--cache-dir", default="data/raw", help="GameStore directory of play-by-play payloads")
+    parser.add_argument("--out", default="data/xg", help="output directory")
+    parser.add_argument("--offline", action="store_true", help="only use the local cache")
+    parser.add_argument("--features", nargs="+", default=["distance"], help="model input features")
+    parser.add_argument("--model-path", help="pickled model to score with in-process")
+    parser.add_argument("--ip", help="serving app host, to score through the serving app")
+    parser.add_argument("--port", type=int, default=5000, help="serving app port")
+    parser.add_argument("--model", help="serving app model (default: its current model)")
+    parser.add_argument("--version", help="serving app model version")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-rows", type=int, default=200_000)
+    parser.add_argument("--max-pending", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.game_ids:
+        game_ids = args.game_ids
+    elif args.season is not None:
+        game_ids = game_id_range(args.season, args.first, args.last, args.game_type)
+    else:
+        parser.error("give --season or --game-ids")
+
+    if args.model_path:
+        score_fn = in_process_scorer(args.model_path, args.features)
+    elif args.ip:
+        score_fn = serving_scorer(args.ip, args.port, args.features, args.model, args.version)
+    else:
+        score_fn = None
+
+    logging.basicConfig(level=logging.INFO)
+    backfill = Backfill(
+        args.out,
+        args.cache_dir,
+        args.features,
+        score_fn=score_fn,
+        workers=args.workers,
+        batch_rows=args.batch_rows,
+        max_pending=args.max_pending,
+        offline=args.offline,
+    )
+    stats = backfill.run(game_ids)
+    logger.info(f"Backfill done: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Local stand-in for api-web.nhle.com that replays recorded games.
+
+Each game's plays are revealed progressively, at the game-clock time they
+happened divided by ``speed`` (``speed=60`` plays a 60-minute game in one
+minute). While plays remain hidden the game is "LIVE"; once all are out it
+takes the recorded final state. Serves:
+
+    /v1/gamecenter/<game_id>/play-by-play   snapshot so far, with an ETag (304 when unchanged)
+    /v1/scoreboard/now                      every replayed game and its state
+
+Point ``GameClient(base_url=server.base_url)`` at it.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+PERIOD_SECONDS = 1200
+_PLAY_BY_PLAY = re.compile(r"^/v1/gamecenter/(\w+)/play-by-play$")
+
+
+def game_seconds(play: Dict, fallback: float) -> float:
+    """Seconds of game clock elapsed at a play, from its period and timeInPeriod."""
+    try:
+        period = play["periodDescriptor"]["number"]
+        minutes, seconds = play["timeInPeriod"].split(":")
+    except (KeyError, TypeError, ValueError):
+        return fallback
+    return (period - 1) * PERIOD_SECONDS + int(minutes) * 60 + int(seconds)
+
+
+class ReplayGame:
+
+    def __init__(self, game_id: str, payload: Dict, start: float, speed: float):
+        self.game_id = game_id
+        self.payload = payload
+        self.final_state = payload.get("gameState", "OFF")
+
+        plays = payload.get("plays", [])
+        elapsed, last = [], 0.0
+        for play in plays:
+            # keep reveal times non-decreasing even if a clock value is missing
+            last = max(last, game_seconds(play, last))
+            elapsed.append(last)
+        self.plays = plays
+        # monotonic time at which play i becomes visible
+        self.reveal_at: List[float] = [start + t / speed for t in elapsed]
+        self.reveal_of = {str(p.get("eventId")): t for p, t in zip(plays, self.reveal_at)}
+        self._snapshot: Tuple[int, bytes] = (-1, b"")
+        self._lock = threading.Lock()
+
+    def visible(self, now: float) -> int:
+        n = 0
+        while n < len(self.reveal_at) and self.reveal_at[n] <= now:
+            n += 1
+        return n
+
+    def state(self, now: float) -> str:
+        return self.final_state if self.visible(now) == len(self.plays) else "LIVE"
+
+    def snapshot(self, now: float) -> Tuple[int, bytes]:
+        """(number of visible plays, JSON body), re-encoded only when a play was revealed."""
+        n = self.visible(now)
+        with self._lock:
+            if self._snapshot[0] != n:
+                body = dict(self.payload, plays=self.plays[:n], gameState=self.state(now))
+                self._snapshot = (n, json.dumps(body).encode())
+            return self._snapshot
+
+
+class ReplayServer:
+
+    def __init__(
+        self,
+        payloads: Dict[str, Dict],
+        speed: float = 60.0,
+        stagger: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        ``payloads`` maps game ids to recorded play-by-play payloads. Games
+        start ``stagger`` seconds apart; ``port=0`` picks a free port.
+        """
+        start = time.monotonic()
+        self.games = {
+            str(game_id): ReplayGame(str(game_id), payload, start + i * stagger, speed)
+            for i, (game_id, payload) in enumerate(payloads.items())
+        }
+        self.requests = 0
+        self.not_modified = 0
+
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                replay.requests += 1
+                status, headers, body = replay.handle(self.path, self.headers.get("If-None-Match"))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="replay-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "ReplayServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reveal_time(self, game_id: str, event_id) -> float | None:
+        """``time.monotonic()`` at which an event became visible."""
+        game = self.games.get(str(game_id))
+        return None if game is None else game.reveal_of.get(str(event_id))
+
+    def handle(self, path: str, if_none_match: str = None) -> Tuple[int, Dict, bytes]:
+        now = time.monotonic()
+        path = path.split("?", 1)[0]
+        json_headers = {"Content-Type": "application/json"}
+
+        if path == "/v1/scoreboard/now":
+            games = [{"id": int(g.game_id), "gameState": g.state(now)} for g in self.games.values()]
+            return 200, json_headers, json.dumps({"games": games}).encode()
+
+        match = _PLAY_BY_PLAY.match(path)
+        game = self.games.get(match.group(1)) if match else None
+        if game is None:
+            return 404, json_headers, b'{"error": "not found"}'
+
+        n, body = game.snapshot(now)
+        etag = f'"{game.game_id}-{n}"'
+        if if_none_match == etag:
+            self.not_modified += 1
+            return 304, {"ETag": etag}, b""
+        return 200, {**json_headers, "ETag": etag}, body
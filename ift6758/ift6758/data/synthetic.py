@@ -0,0 +1,89 @@
+"""
+Synthetic NHL play-by-play payloads shaped like
+https://api-web.nhle.com/v1/gamecenter/<game_id>/play-by-play, for
+benchmarks and offline runs. Only the fields the client code reads are filled.
+"""
+import random
+from typing import Dict, List
+
+TEAMS = [
+    (1, "Devils", "NJD"), (6, "Bruins", "BOS"), (8, "Canadiens", "MTL"),
+    (10, "Maple Leafs", "TOR"), (16, "Blackhawks", "CHI"), (22, "Oilers", "EDM"),
+    (23, "Canucks", "VAN"), (54, "Golden Knights", "VGK"),
+]
+
+# rough share of each event type in a real game
+EVENT_TYPES = [
+    ("faceoff", 60), ("hit", 45), ("shot-on-goal", 58), ("blocked-shot", 30),
+    ("missed-shot", 25), ("giveaway", 15), ("takeaway", 12), ("stoppage", 40),
+    ("goal", 6), ("penalty", 8),
+]
+SHOT_TYPES = ["wrist", "snap", "slap", "backhand", "tip-in", "deflected", "wrap-around"]
+SITUATION_CODES = ["1551"] * 17 + ["1451", "1541", "1441", "0651", "1560"]
+
+
+def season_game_ids(season: int, n_games: int) -> List[str]:
+    """Regular-season game ids, e.g. ``season_game_ids(2023, 2)`` -> 2023020001, 2023020002."""
+    return [f"{season}02{i:04d}" for i in range(1, n_games + 1)]
+
+
+def make_game_payload(game_id: str, n_plays: int = 300, seed: int | None = None, state: str = "OFF") -> Dict:
+    """Build a play-by-play payload with ``n_plays`` plays for ``game_id``."""
+    rng = random.Random(seed if seed is not None else int(game_id))
+    (home_id, home_name, home_abbrev), (away_id, away_name, away_abbrev) = rng.sample(TEAMS, 2)
+
+    roster = []
+    for team_id in (home_id, away_id):
+        for i in range(20):
+            roster.append({
+                "teamId": team_id,
+                "playerId": 8470000 + team_id * 100 + i,
+                "firstName": {"default": f"First{team_id}_{i}"},
+                "lastName": {"default": f"Last{team_id}_{i}"},
+                "positionCode": "G" if i == 0 else "C",
+            })
+    goalies = {home_id: 8470000 + home_id * 100, away_id: 8470000 + away_id * 100}
+
+    kinds, weights = zip(*EVENT_TYPES)
+    plays = []
+    for i in range(n_plays):
+        kind = rng.choices(kinds, weights)[0]
+        period = min(3, 1 + i * 3 // max(n_plays, 1))
+        owner = rng.choice((home_id, away_id))
+        defending = away_id if owner == home_id else home_id
+        seconds_left = 1200 - (i * 3600 // max(n_plays, 1)) % 1200
+
+        details = {"eventOwnerTeamId": owner}
+        if kind in ("shot-on-goal", "goal", "missed-shot", "blocked-shot"):
+            shooter = 8470000 + owner * 100 + rng.randint(1, 19)
+            if kind == "goal":
+                details["scoringPlayerId"] = shooter
+            else:
+                details["shootingPlayerId"] = shooter
+            details["shotType"] = rng.choice(SHOT_TYPES)
+            # a few shots have an empty net or no recorded goalie
+            if rng.random() > 0.03:
+                details["goalieInNetId"] = goalies[defending]
+        if kind != "stoppage" and rng.random() > 0.02:
+            details["xCoord"] = rng.randint(-99, 99)
+            details["yCoord"] = rng.randint(-42, 42)
+
+        plays.append({
+            "eventId": 100 + i,
+            "periodDescriptor": {"number": period, "periodType": "REG"},
+            "timeInPeriod": f"{(1200 - seconds_left) // 60:02d}:{(1200 - seconds_left) % 60:02d}",
+            "timeRemaining": f"{seconds_left // 60:02d}:{seconds_left % 60:02d}",
+            "situationCode": rng.choice(SITUATION_CODES),
+            "typeDescKey": kind,
+            "sortOrder": 10 * (i + 1),
+            "details": details,
+        })
+
+    return {
+        "id": int(game_id),
+        "gameState": state,
+        "homeTeam": {"id": home_id, "commonName": {"default": home_name}, "abbrev": home_abbrev},
+        "awayTeam": {"id": away_id, "commonName": {"default": away_name}, "abbrev": away_abbrev},
+        "rosterSpots": roster,
+        "plays": plays,
+    }
@@ -0,0 +1,141 @@
+"""
+Backfill against play-by-play fixtures written to ``tmp_path``; no network
+(every run is ``offline=True``).
+
+    $ cd ift6758 && python -m pytest tests
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ift6758.client.features import build_features
+from ift6758.data.backfill import MANIFEST, Backfill
+from ift6758.data.synthetic import make_game_payload
+
+pytest.importorskip("pyarrow")
+
+SEASON = 2023
+FEATURES = ["distance"]
+
+
+def score(X: pd.DataFrame) -> np.ndarray:
+    return 1 / (1 + np.exp(0.05 * X["distance"].to_numpy() - 1))
+
+
+def write_fixture(cache_dir, game_id: str, state: str = "OFF", n_plays: int = 120) -> dict:
+    """A loose ``<season>/<game_id>.json`` file, as GameStore picks them up."""
+    payload = make_game_payload(game_id, n_plays=n_plays, state=state)
+    path = cache_dir / game_id[:4] / f"{game_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload))
+    return payload
+
+
+def make_backfill(tmp_path, **kwargs) -> Backfill:
+    return Backfill(
+        tmp_path / "out", tmp_path / "raw", FEATURES, score_fn=score, workers=1, offline=True, **kwargs
+    )
+
+
+def read_manifest(tmp_path) -> dict:
+    with open(tmp_path / "out" / MANIFEST) as f:
+        return json.load(f)
+
+
+def read_parts(tmp_path) -> pd.DataFrame:
+    parts = sorted((tmp_path / "out").glob("season=*/part-*.parquet"))
+    return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+
+
+@pytest.fixture
+def games(tmp_path):
+    ids = [f"{SEASON}02{i:04d}" for i in range(1, 4)]
+    return {game_id: write_fixture(tmp_path / "raw", game_id) for game_id in ids}
+
+
+def test_parts_and_manifest(tmp_path, games):
+    stats = make_backfill(tmp_path).run(games)
+
+    expected = pd.concat(
+        [build_features(p["plays"], p).assign(game_id=g) for g, p in games.items()], ignore_index=True
+    )
+    written = read_parts(tmp_path)
+    assert stats == {"games": 3, "shots": len(expected), "skipped": 0, "parts": 1}
+    assert len(written) == len(expected) > 0
+    assert set(written["game_id"]) == set(games)
+
+    written = written.sort_values(["game_id", "event_id"], ignore_index=True)
+    expected = expected.sort_values(["game_id", "event_id"], ignore_index=True)
+    np.testing.assert_allclose(written["distance"], expected["distance"])
+    complete = written["distance"].notna()
+    np.testing.assert_allclose(written.loc[complete, "goal_prob"], score(written.loc[complete]))
+    assert written.loc[~complete, "goal_prob"].isna().all()
+
+    manifest = read_manifest(tmp_path)
+    assert manifest["parts"] == [f"season={SEASON}/part-00001.parquet"]
+    assert manifest["games"] == {game_id: manifest["parts"][0] for game_id in games}
+
+
+def test_batches_split_into_parts(tmp_path, games):
+    # every game fills a batch on its own
+    stats = make_backfill(tmp_path, batch_rows=1).run(games)
+
+    manifest = read_manifest(tmp_path)
+    assert stats["parts"] == len(manifest["parts"]) == 3
+    assert sorted(manifest["games"].values()) == sorted(manifest["parts"])
+    for game_id, part in manifest["games"].items():
+        assert set(pd.read_parquet(tmp_path / "out" / part)["game_id"]) == {game_id}
+
+
+def test_resume_skips_finished_games(tmp_path, games):
+    ids = list(games)
+    make_backfill(tmp_path).run(ids[:2])
+    first = read_manifest(tmp_path)
+
+    stats = make_backfill(tmp_path).run(ids)
+    assert stats["games"] == 1
+    manifest = read_manifest(tmp_path)
+    assert manifest["parts"][:1] == first["parts"]
+    assert manifest["games"][ids[2]] == manifest["parts"][1]
+    assert {g: manifest["games"][g] for g in ids[:2]} == first["games"]
+
+    # every game written exactly once
+    written = read_parts(tmp_path)
+    assert written.groupby("game_id")["event_id"].apply(lambda e: e.is_unique).all()
+    assert set(written["game_id"]) == set(ids)
+
+    assert make_backfill(tmp_path).run(ids)["games"] == 0
+
+
+def test_orphan_parts_removed(tmp_path, games):
+    make_backfill(tmp_path).run(games)
+    recorded = tmp_path / "out" / read_manifest(tmp_path)["parts"][0]
+    # a part written just before a crash, never recorded in the manifest
+    orphan = recorded.with_name("part-00002.parquet")
+    orphan.write_bytes(recorded.read_bytes())
+
+    make_backfill(tmp_path)
+    assert recorded.exists()
+    assert not orphan.exists()
+
+
+def test_missing_and_unfinished_games_skipped(tmp_path, games):
+    live = f"{SEASON}020010"
+    missing = f"{SEASON}020011"
+    write_fixture(tmp_path / "raw", live, state="LIVE")
+
+    stats = make_backfill(tmp_path).run([*games, live, missing])
+    assert stats["skipped"] == 2
+    assert stats["games"] == 3
+
+    manifest = read_manifest(tmp_path)
+    # skipped games are not checkpointed: a later run tries them again
+    assert live not in manifest["games"] and missing not in manifest["games"]
+    assert set(read_parts(tmp_path)["game_id"]) == set(games)
+
+    write_fixture(tmp_path / "raw", missing)
+    stats = make_backfill(tmp_path).run([*games, live, missing])
+    assert stats == {"games": 1, "shots": stats["shots"], "skipped": 1, "parts": 1}
+    assert missing in read_manifest(tmp_path)["games"]
@@ -0,0 +1,138 @@
+"""
+GameClient's incremental play diff on synthetic play-by-play payloads, served
+from memory; no network.
+
+    $ cd ift6758 && python -m pytest tests
+"""
+import copy
+
+import pytest
+
+from ift6758.client.features import EVENT_MAP
+from ift6758.client.game_client import GameClient
+from ift6758.client.http_fetcher import FetchResult
+from ift6758.data.synthetic import make_game_payload
+
+GAME_ID = "2023020001"
+
+
+class FeedFetcher:
+    """Answers every play-by-play request with the current ``payload``, without validators."""
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+
+    def get_json(self, url, parse=None) -> FetchResult:
+        return FetchResult(copy.deepcopy(self.payload), False, None)
+
+    def forget(self, url):
+        pass
+
+
+def shot_ids(plays) -> list:
+    return [play["eventId"] for play in plays if play["typeDescKey"] in EVENT_MAP]
+
+
+def ping(client: GameClient):
+    """Poll and commit once: (event ids of the shots to score, removed event ids)."""
+    poll = client.poll(GAME_ID)
+    client.commit(poll)
+    ids = [] if poll.features.empty else poll.features["event_id"].tolist()
+    return ids, poll.removed_event_ids
+
+
+@pytest.fixture
+def payload():
+    return make_game_payload(GAME_ID, n_plays=200, state="LIVE")
+
+
+@pytest.fixture
+def feed(payload):
+    return FeedFetcher(payload)
+
+
+def make_client(feed, **kwargs) -> GameClient:
+    # no periodic full check unless a test asks for one: edits must be found by the tail diff
+    kwargs.setdefault("full_check_every", 0)
+    return GameClient(serving_client=None, fetcher=feed, recheck_window=10, **kwargs)
+
+
+def test_only_appended_plays_are_new(feed, payload):
+    plays = payload["plays"]
+    feed.payload = dict(payload, plays=plays[:150])
+    client = make_client(feed)
+
+    assert ping(client) == (shot_ids(plays[:150]), [])
+    assert ping(client) == ([], [])
+
+    feed.payload = payload
+    assert ping(client) == (shot_ids(plays[150:]), [])
+
+
+def test_edit_inside_recheck_window(feed, payload):
+    client = make_client(feed)
+    ping(client)
+
+    last_shot = shot_ids(payload["plays"][-10:])[-1]
+    for play in payload["plays"]:
+        if play["eventId"] == last_shot:
+            play["details"]["xCoord"] = -play["details"].get("xCoord", 0) + 1
+    assert ping(client) == ([last_shot], [])
+
+
+def test_edit_into_non_shot_is_removed(feed, payload):
+    client = make_client(feed)
+    ping(client)
+
+    last_shot = shot_ids(payload["plays"][-10:])[-1]
+    for play in payload["plays"]:
+        if play["eventId"] == last_shot:
+            play["typeDescKey"] = "missed-shot"
+    assert ping(client) == ([], [str(last_shot)])
+
+
+def test_edit_before_window_waits_for_full_check(feed, payload):
+    client = make_client(feed, full_check_every=3)
+    ping(client)
+
+    early_shot = shot_ids(payload["plays"][:50])[0]
+    for play in payload["plays"]:
+        if play["eventId"] == early_shot:
+            play["details"]["shotType"] = "slap" if play["details"]["shotType"] != "slap" else "wrist"
+    # outside the recheck window: only the every-3rd-ping full comparison sees it
+    assert ping(client) == ([], [])
+    assert ping(client) == ([early_shot], [])
+
+
+def test_inserted_play_before_tail(feed, payload):
+    client = make_client(feed)
+    ping(client)
+
+    inserted = copy.deepcopy(next(p for p in payload["plays"] if p["typeDescKey"] == "shot-on-goal"))
+    inserted["eventId"] = 9999
+    payload["plays"].insert(20, inserted)
+    assert ping(client) == ([9999], [])
+    assert ping(client) == ([], [])
+
+
+def test_deleted_shot_before_tail(feed, payload):
+    client = make_client(feed)
+    ping(client)
+
+    deleted = shot_ids(payload["plays"][:50])[0]
+    payload["plays"] = [p for p in payload["plays"] if p["eventId"] != deleted]
+    assert ping(client) == ([], [str(deleted)])
+    assert ping(client) == ([], [])
+
+
+def test_same_diff_as_full_comparison(feed, payload):
+    """Appends with edits in the window: the tail diff finds what comparing every play finds."""
+    plays = payload["plays"]
+    tail = make_client(feed)
+    full = make_client(feed, full_check_every=1)
+
+    for end in range(40, len(plays) + 1, 40):
+        feed.payload = dict(payload, plays=copy.deepcopy(plays[:end]))
+        for play in feed.payload["plays"][-5:]:
+            play["situationCode"] = "1451"
+        assert ping(tail) == ping(full)
@@ -0,0 +1,83 @@
+"""
+Conditional requests (ETag / 304) against a local ReplayServer holding a
+synthetic game whose plays are all revealed at once.
+
+    $ cd ift6758 && python -m pytest tests
+"""
+import pytest
+
+from ift6758.client.game_client import GameClient
+from ift6758.client.http_fetcher import HttpFetcher
+from ift6758.client.play_by_play import parse_play_by_play
+from ift6758.data.replay import ReplayServer
+from ift6758.data.synthetic import make_game_payload
+
+GAME_ID = "2023020001"
+
+
+@pytest.fixture
+def server():
+    payload = make_game_payload(GAME_ID, n_plays=120, state="LIVE")
+    # fast enough that every play is visible by the first request
+    server = ReplayServer({GAME_ID: payload}, speed=1e9).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = HttpFetcher()
+    yield fetcher
+    fetcher.close()
+
+
+def game_url(server) -> str:
+    return f"{server.base_url}/gamecenter/{GAME_ID}/play-by-play"
+
+
+def test_revalidation_returns_remembered_payload(server, fetcher):
+    first = fetcher.get_json(game_url(server))
+    second = fetcher.get_json(game_url(server))
+
+    assert not first.not_modified
+    assert second.not_modified
+    assert server.not_modified == 1
+    assert second.payload is first.payload
+    assert second.validator == first.validator is not None
+
+
+def test_payloads_remembered_per_parse(server, fetcher):
+    full = fetcher.get_json(game_url(server))
+    selective = fetcher.get_json(game_url(server), parse=parse_play_by_play)
+
+    # a 304 for one parse must not hand back the other parse's payload
+    assert not selective.not_modified
+    assert len(selective.payload["plays"]) < len(full.payload["plays"])
+    assert fetcher.get_json(game_url(server), parse=parse_play_by_play).payload is selective.payload
+
+    fetcher.forget(game_url(server))
+    assert not fetcher.get_json(game_url(server)).not_modified
+
+
+def test_unchanged_game_skips_diff(server, fetcher):
+    client = GameClient(serving_client=None, fetcher=fetcher, base_url=server.base_url)
+
+    poll = client.poll(GAME_ID)
+    assert not poll.features.empty
+    client.commit(poll)
+
+    poll = client.poll(GAME_ID)
+    assert server.not_modified == 1
+    assert poll.features.empty
+    assert poll.payload is None and poll.diff is None
+    client.commit(poll)
+
+
+def test_uncommitted_poll_comes_back_after_304(server, fetcher):
+    client = GameClient(serving_client=None, fetcher=fetcher, base_url=server.base_url)
+
+    first = client.poll(GAME_ID)
+    # e.g. scoring failed: nothing was committed, so the same shots are due again
+    again = client.poll(GAME_ID)
+    assert server.not_modified == 1
+    assert again.features["event_id"].tolist() == first.features["event_id"].tolist()
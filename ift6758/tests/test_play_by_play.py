@@ -0,0 +1,64 @@
+"""
+parse_play_by_play against a plain ``json.loads`` of synthetic payloads, with
+every parser backend installed here.
+
+    $ cd ift6758 && python -m pytest tests
+"""
+import json
+
+import pytest
+
+from ift6758.client import play_by_play
+from ift6758.client.features import EVENT_MAP
+from ift6758.client.play_by_play import parse_play_by_play
+from ift6758.data.synthetic import make_game_payload
+
+BACKENDS = [
+    name for name, module in [("simdjson", play_by_play.simdjson), ("orjson", play_by_play.orjson), ("json", json)]
+    if module is not None
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    # each backend is used when the faster ones are missing
+    if request.param != "simdjson":
+        monkeypatch.setattr(play_by_play, "simdjson", None)
+    if request.param == "json":
+        monkeypatch.setattr(play_by_play, "orjson", None)
+    return request.param
+
+
+def body_of(state: str, **kwargs) -> bytes:
+    payload = make_game_payload("2023020001", n_plays=300, state=state)
+    payload.update(kwargs)
+    return json.dumps(payload).encode()
+
+
+@pytest.mark.parametrize("state", ["LIVE", "CRIT", "PRE"])
+def test_game_in_progress_keeps_scored_plays(backend, state):
+    body = body_of(state, clock={"timeRemaining": "12:34", "inIntermission": False})
+    expected = json.loads(body)
+    parsed = parse_play_by_play(body)
+
+    kept = [play for play in expected["plays"] if play["typeDescKey"] in EVENT_MAP]
+    assert 0 < len(kept) < len(expected["plays"])
+    assert parsed["plays"] == kept
+    assert {k: v for k, v in parsed.items() if k != "plays"} == {k: v for k, v in expected.items() if k != "plays"}
+
+
+@pytest.mark.parametrize("state", ["OFF", "FINAL"])
+def test_final_game_parsed_whole(backend, state):
+    body = body_of(state)
+    assert parse_play_by_play(body) == json.loads(body)
+
+
+def test_other_event_types(backend):
+    body = body_of("LIVE")
+    parsed = parse_play_by_play(body, event_types={"hit", "goal"})
+    assert parsed["plays"] == [p for p in json.loads(body)["plays"] if p["typeDescKey"] in ("hit", "goal")]
+
+
+def test_payload_without_plays(backend):
+    body = json.dumps({"id": 2023020001, "gameState": "FUT"}).encode()
+    assert parse_play_by_play(body) == {"id": 2023020001, "gameState": "FUT", "plays": []}
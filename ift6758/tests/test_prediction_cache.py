@@ -0,0 +1,121 @@
+"""
+serving/prediction_cache.py on shot features of a synthetic game: cached
+answers must never outlive the model (scorer) that produced them.
+
+    $ cd ift6758 && python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ift6758.client.features import build_features
+from ift6758.data.synthetic import make_game_payload
+
+# the serving app is not a package: import its modules the way its container does
+SERVING = str(Path(__file__).resolve().parents[2] / "serving")
+if SERVING not in sys.path:
+    sys.path.insert(0, SERVING)
+
+from prediction_cache import PredictionCache  # noqa: E402
+
+MODEL = ("xgb-distance", "1")
+OTHER = ("xgb-distance", "2")
+
+
+class Scorer:
+    """Linear logit on the features, counting the rows it scores."""
+
+    def __init__(self, slope: float):
+        self.slope = slope
+        self.rows = 0
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        self.rows += len(X)
+        return 1 / (1 + np.exp(self.slope * np.nan_to_num(X).sum(axis=1) - 1))
+
+
+@pytest.fixture
+def X() -> np.ndarray:
+    payload = make_game_payload("2023020001", n_plays=300)
+    shots = build_features(payload["plays"], payload)[["distance", "angle_from_net"]]
+    X = shots.dropna().to_numpy(dtype=np.float64)
+    # a feed re-sends the same shots: score the game twice in one batch
+    return np.concatenate([X, X])
+
+
+def distinct(X: np.ndarray) -> int:
+    return len(np.unique(X, axis=0))
+
+
+def test_repeated_rows_scored_once(X):
+    cache = PredictionCache(max_entries=1_000)
+    scorer = Scorer(0.05)
+
+    np.testing.assert_array_equal(cache.score(MODEL, scorer, X), Scorer(0.05)(X))
+    assert scorer.rows == distinct(X)
+
+    np.testing.assert_array_equal(cache.score(MODEL, scorer, X), Scorer(0.05)(X))
+    assert scorer.rows == distinct(X)
+    assert cache.stats()["hits"] == cache.stats()["misses"] == len(X)
+
+
+def test_new_scorer_for_same_model_drops_its_entries(X):
+    cache = PredictionCache(max_entries=1_000)
+    old, new, other = Scorer(0.05), Scorer(0.02), Scorer(0.03)
+    cache.score(MODEL, old, X)
+    cache.score(OTHER, other, X)
+
+    # e.g. "latest" re-downloaded: same key, different scorer
+    np.testing.assert_array_equal(cache.score(MODEL, new, X), Scorer(0.02)(X))
+    assert new.rows == distinct(X)
+
+    other.rows = 0
+    cache.score(OTHER, other, X)
+    assert other.rows == 0
+
+
+def test_invalidate(X):
+    cache = PredictionCache(max_entries=1_000)
+    scorer = Scorer(0.05)
+    cache.score(MODEL, scorer, X)
+    size = cache.stats()["size"]
+
+    cache.score(OTHER, scorer, X)
+    cache.invalidate(MODEL)
+    assert cache.stats()["size"] == size
+
+    scorer.rows = 0
+    cache.score(MODEL, scorer, X)
+    assert scorer.rows == distinct(X)
+
+
+def test_results_of_a_replaced_scorer_not_stored(X):
+    cache = PredictionCache(max_entries=1_000)
+    new = Scorer(0.02)
+
+    class SwitchedWhileScoring(Scorer):
+        def __call__(self, X):
+            # the model switches while this batch is being scored
+            cache.score(MODEL, new, X[:1])
+            return super().__call__(X)
+
+    old = SwitchedWhileScoring(0.05)
+    np.testing.assert_array_equal(cache.score(MODEL, old, X), Scorer(0.05)(X))
+
+    new.rows = 0
+    np.testing.assert_array_equal(cache.score(MODEL, new, X), Scorer(0.02)(X))
+    assert new.rows == distinct(X) - 1
+
+
+def test_large_batches_and_disabled_cache_bypass(X):
+    scorer = Scorer(0.05)
+    PredictionCache(max_entries=0).score(MODEL, scorer, X)
+    assert scorer.rows == len(X)
+
+    cache = PredictionCache(max_entries=1_000, max_batch=len(X) - 1)
+    scorer.rows = 0
+    cache.score(MODEL, scorer, X)
+    assert scorer.rows == len(X)
+    assert cache.stats()["size"] == 0
@@ -3,102 +3,454 @@ If you are in the same directory as this file (app.py), you can run run the app
     
     $ gunicorn --bind 0.0.0.0:<PORT> app:app
 
+or, to load and warm up the default model once in the master before the
+workers are forked (see gunicorn.conf.py):
+
+    $ gunicorn --config gunicorn.conf.py --bind 0.0.0.0:<PORT> app:app
+
 gunicorn can be installed via:
 
     $ pip install gunicorn
 
 """
 import os
+import json as jsonlib
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
 import logging
-from flask import Flask, jsonify, request, abort
+from flask import Flask, Response, jsonify, request, abort, g, stream_with_context
+from werkzeug.exceptions import HTTPException
 
 app = Flask(__name__)
 
-import sklearn
-import pandas as pd
-import joblib
-import wandb
+# sklearn, scipy and joblib are imported when the first model is unpickled, wandb when an
+# artifact has to be downloaded and pandas with the live game loops, so that importing this
+# module (a worker boot, or the gunicorn master with preload_app) stays cheap
+import metrics
+from log_utils import env_settings, read_lines, sample_payload, setup_logging, tail_lines
+from artifact_store import ArtifactStore
+from inference import features_to_array, linear_scorer, make_grid_scorer, make_scorer, score_complete_rows
+from model_cache import CachedModel, ModelCache
+from model_switch import JobStore, ModelStamp
+from prediction_cache import PredictionCache
+from payload import FLOAT_MATRIX, JSON, decode_features, encode_float_matrix, request_formats
+
+# PRELOAD_MODEL=1 loads and warms up the default model when this module is imported instead
+# of on the first request; gunicorn.conf.py sets it together with preload_app
+PRELOAD_MODEL = os.environ.get("PRELOAD_MODEL", "0") == "1"
+WARMUP_ROWS = 256
+
+# FLASK_LOG, rotated at LOG_MAX_MB with LOG_BACKUPS old files
+LOG_SETTINGS = env_settings()
+LOG_FILE = LOG_SETTINGS["log_file"]
+# fraction of /predict payloads written to the log, and their length cap
+LOG_PAYLOAD_SAMPLE = float(os.environ.get("LOG_PAYLOAD_SAMPLE", "0.01"))
+LOG_PAYLOAD_MAX_CHARS = int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", "500"))
+# /logs page size when no limit/tail is given, and its upper bound
+LOGS_PAGE_SIZE = 500
+LOGS_MAX_PAGE_SIZE = 10_000
+
+# GRID_INFERENCE=1 compiles each loaded model that has no exact linear fast path (i.e. would
+# be scored with predict_proba) into a precomputed probability grid over FEATURE_GRID, kept
+# only if interpolation stays within GRID_TOLERANCE of predict_proba
+GRID_INFERENCE = os.environ.get("GRID_INFERENCE", "0") == "1"
+GRID_TOLERANCE = float(os.environ.get("GRID_TOLERANCE", "1e-4"))
+
+# (low, high, step) of each feature as produced by build_features: distance is rounded
+# to the foot, angle_from_net is in [0, 180] degrees
+FEATURE_GRID = {
+    "distance": (0, 200, 1),
+    "angle_from_net": (0, 180, 1),
+}
+
+
+def build_scorer(key, model):
+    """
+    Scorer for a newly loaded model: the exact linear fast path when it has
+    one, otherwise a lookup grid if enabled and accurate enough.
+    """
+    scorer = linear_scorer(model)
+    if scorer is not None:
+        return scorer
+    scorer = make_scorer(model)
+    if not GRID_INFERENCE:
+        return scorer
+
+    model_name, version = key
+    axes = [FEATURE_GRID[feature] for feature in FEATURE_MAP[model_name]]
+    grid = make_grid_scorer(model, axes, fallback=scorer, tolerance=GRID_TOLERANCE)
+    if grid is None:
+        app.logger.warning(f"No lookup grid for {model_name}:{version} within tolerance {GRID_TOLERANCE}")
+        return scorer
+    app.logger.info(f"Lookup grid for {model_name}:{version}: shape {grid.shape}, max error {grid.max_error:.2e}")
+    return grid
+
+
+# bounded LRU cache of loaded models shared by /download_registry_model and /predict
+MODEL_CACHE_SIZE = int(os.environ.get("MODEL_CACHE_SIZE", "4"))
+MODEL_CACHE_MAX_MB = float(os.environ.get("MODEL_CACHE_MAX_MB", "512"))
+app.model_cache = ModelCache(
+    max_models=MODEL_CACHE_SIZE,
+    max_bytes=int(MODEL_CACHE_MAX_MB * 1024 * 1024),
+    scorer_factory=build_scorer,
+)
+
+# optional memoized predictions per (model, version, feature row), off unless PREDICTION_CACHE_SIZE > 0;
+# PREDICTION_CACHE_DECIMALS rounds the cache keys (never the scored values), trading exactness for hits
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "0"))
+PREDICTION_CACHE_DECIMALS = os.environ.get("PREDICTION_CACHE_DECIMALS")
+PREDICTION_CACHE_MAX_BATCH = int(os.environ.get("PREDICTION_CACHE_MAX_BATCH", "256"))
+app.prediction_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_SIZE,
+    decimals=int(PREDICTION_CACHE_DECIMALS) if PREDICTION_CACHE_DECIMALS else None,
+    max_batch=PREDICTION_CACHE_MAX_BATCH,
+)
+
+# content-addressed copies of downloaded artifacts; "latest" is re-fetched after ARTIFACT_TTL seconds
+ARTIFACT_STORE = os.environ.get("ARTIFACT_STORE", "model_store")
+ARTIFACT_TTL = float(os.environ.get("ARTIFACT_TTL", "3600"))
+app.artifact_store = ArtifactStore(ARTIFACT_STORE, ttl=ARTIFACT_TTL)
+
+# model switches go through the store too: jobs write their status there and publish the new
+# default model in a stamp that every worker checks before each request
+app.model_stamp = ModelStamp(ARTIFACT_STORE)
+app.switch_jobs = JobStore(ARTIFACT_STORE)
+app.model_serial = 0
+# store digest of the model cached under each (name, version), to spot a new "latest"
+app.model_digests = {}
+_switch_lock = threading.Lock()
+_switch_executor = None
+_switch_executor_lock = threading.Lock()
+
+WANDB_PROJECT = "ift6758-shot-prediction"
+
+# map flask model to wandb model
+ARTIFACT_MAP = {
+    "distance": "logreg_distance_model",
+    "angle_from_net": "logreg_angle_model",
+    "distance_angle": "logreg_distance_angle_model",
+}
+
+# map flask model to the features it was trained on
+FEATURE_MAP = {
+    "distance": ["distance"],
+    "angle_from_net": ["angle_from_net"],
+    "distance_angle": ["distance", "angle_from_net"],
+}
+
+
+def local_model_path(model_name: str, version: str) -> Path:
+    return Path(f"{ARTIFACT_MAP[model_name]}_{version}.pkl")
+
+
+def resolve_local_model(model_name: str, version: str, allow_stale: bool = False) -> Path | None:
+    """Find a model in the artifact store without touching the network."""
+    artifact_name = ARTIFACT_MAP[model_name]
+    store = app.artifact_store
+    path = store.resolve(artifact_name, version, allow_stale=allow_stale)
+
+    # a pkl shipped next to app.py (e.g. baked into the image) seeds the store once
+    if path is None and store.resolve(artifact_name, version, allow_stale=True) is None:
+        legacy_path = local_model_path(model_name, version)
+        if legacy_path.exists():
+            path = store.put(artifact_name, version, legacy_path)
+    return path
+
+
+class ActiveModel(NamedTuple):
+    """The default model, replaced as a whole so a request never mixes two models."""
+    name: str
+    version: str
+    model: object
+    scorer: object
+
+
+app.active = None
+
+
+def download_model(model_name: str, version: str, job_type: str, entity: str = None) -> Path:
+    """Download a model artifact from wandb straight into the artifact store."""
+    import wandb
+
+    artifact_name = ARTIFACT_MAP[model_name]
+
+    run = wandb.init(project=WANDB_PROJECT, job_type=job_type, entity=entity, reinit=True)
+
+    artifact = run.use_artifact(f"{artifact_name}:{version}", type="model")
+    artifact_dir = artifact.download()
+
+    # find pkl file inside artifact directory
+    pkl_files = list(Path(artifact_dir).rglob("*.pkl"))
+    if not pkl_files:
+        raise FileNotFoundError("Artifact contains no .pkl file")
+
+    # link it into the store as is: no load/dump round trip
+    return app.artifact_store.put(artifact_name, version, pkl_files[0])
+
+
+def load_local_model(model_name: str, version: str) -> CachedModel:
+    """Return a model from the cache, loading it from the artifact store on a miss."""
+    def loader():
+        path = resolve_local_model(model_name, version, allow_stale=True)
+        if path is None:
+            raise FileNotFoundError(f"Model {model_name}:{version} is not available locally")
+        with metrics.timed(metrics.MODEL_LOAD_LATENCY.labels("load")):
+            model = ArtifactStore.load(path)
+        app.model_digests[(model_name, version)] = path.stem
+        return model
 
-LOG_FILE = os.environ.get("FLASK_LOG", "flask.log")
+    return app.model_cache.get_or_load((model_name, version), loader)
 
 
+def load_store_object(model_name: str, version: str, path: Path) -> CachedModel:
+    """
+    Return ``model_name:version`` as stored in ``path``, from the cache if it
+    holds that very object, otherwise loaded and cached in place of any older one.
+    """
+    key = (model_name, version)
+    entry = app.model_cache.get(key) if app.model_digests.get(key) == path.stem else None
+    if entry is None:
+        with metrics.timed(metrics.MODEL_LOAD_LATENCY.labels("load")):
+            model = ArtifactStore.load(path)
+        entry = app.model_cache.put(key, model)
+        app.model_digests[key] = path.stem
+        app.prediction_cache.invalidate(key)
+    return entry
 
 
+def set_current_model(entry: CachedModel, name: str, version: str):
+    """Make ``entry`` the default model served by /predict, warmed up before it is visible."""
+    warmup(entry.scorer, name)
+    app.active = ActiveModel(name, version, entry.model, entry.scorer)
 
-@app.before_first_request
-def before_first_request():
+
+def warmup(scorer, model_name: str):
+    """Push a synthetic batch through the /predict path so the first real request is not the slow one."""
+    required = FEATURE_MAP[model_name]
+    records = [{feature: float(i % 100) for feature in required} for i in range(WARMUP_ROWS)]
+    probs = scorer(features_to_array(records, required))
+    encode_float_matrix(["goal_prob"], probs)
+    jsonlib.dumps(probs.tolist())
+
+
+def fetch_model(model_name: str, version: str, job_type: str, entity: str = None) -> tuple[Path, str]:
     """
-    Hook to handle any initialization before the first request (e.g. load model,
-    setup logging handler, etc.)
+    Path of ``model_name:version`` in the artifact store, downloading it only
+    if the store has no fresh copy. If the download fails, a stale local copy
+    is used when there is one; otherwise the exception propagates.
+
+    Also returns a description of where the model came from, for logging.
     """
-    # TODO: setup basic logging configuration
-    logging.basicConfig(filename=LOG_FILE, level=logging.INFO)
+    path = resolve_local_model(model_name, version)
+    if path is not None:
+        return path, "artifact store"
 
-    default_name = "distance"
-    default_version = "latest"
-    default_artifact = "logreg_distance_model"
-    local_path = Path(f"{default_artifact}_{default_version}.pkl")
+    try:
+        with metrics.timed(metrics.MODEL_LOAD_LATENCY.labels("download")):
+            return download_model(model_name, version, job_type=job_type, entity=entity), "wandb"
+    except Exception as e:
+        path = resolve_local_model(model_name, version, allow_stale=True)
+        if path is None:
+            raise
+        app.logger.warning(f"Download of {model_name}:{version} failed ({e}), using stale local copy")
+        return path, "artifact store (stale)"
 
-    # TODO: any other initialization before the first request (e.g. load default model)
 
-    if local_path.exists():
-        try:
-            app.model = joblib.load(local_path)
-            app.current_model_name = default_name
-            app.current_model_version = default_version
-            app.logger.info("Loaded default model from local file.")
+def activate_model(model_name: str, version: str, job_type: str, entity: str = None) -> str:
+    """
+    Make ``model_name:version`` the default model of this process (see
+    fetch_model). If it cannot be fetched or loaded the current model is kept.
+
+    Returns a description of where the model came from, for logging.
+    """
+    path, source = fetch_model(model_name, version, job_type=job_type, entity=entity)
+    set_current_model(load_store_object(model_name, version, path), model_name, version)
+    return source
+
+
+def sync_model():
+    """
+    Swap in the default model published by a switch job (possibly in another
+    worker) if the stamp moved since this process last looked. Costs a stat
+    otherwise. Only one thread loads the new model; the others go on with the
+    current one meanwhile, and requests already running keep the model they
+    started with.
+    """
+    stamp = app.model_stamp.read()
+    if stamp is None or stamp["serial"] <= app.model_serial:
+        return
+    if not _switch_lock.acquire(blocking=False):
+        return
+    try:
+        if stamp["serial"] <= app.model_serial:
             return
+        model_name, version = stamp["model"], stamp["version"]
+        try:
+            entry = load_store_object(model_name, version, app.artifact_store.objects / stamp["path"])
+            set_current_model(entry, model_name, version)
+            app.logger.info(f"Switched to published model {model_name}:{version} (serial {stamp['serial']})")
         except Exception as e:
-            app.logger.error(f"Local default model exists but failed to load: {e}")
+            app.logger.error(f"Failed to switch to published model {model_name}:{version}: {e}")
+        # a stamp that failed to load is not retried on every request
+        app.model_serial = stamp["serial"]
+    finally:
+        _switch_lock.release()
 
-    
-    app.logger.warning("No default model found. Attempting download")
 
+def run_switch_job(job: dict, entity: str):
+    """Fetch and check the model of a switch job, then publish it to every worker."""
+    model_name, version = job["model"], job["version"]
+    job = app.switch_jobs.update(job, status="running", started_at=time.time())
     try:
-        # initialize wandb client
-        run = wandb.init(
-            project="ift6758-shot-prediction",
-            job_type="download-default",
-            reinit=True
+        path, source = fetch_model(model_name, version, job_type="download", entity=entity)
+        # loading it here both checks it and has it cached when this worker syncs
+        load_store_object(model_name, version, path)
+        stamp = app.model_stamp.publish(model_name, version, path)
+    except Exception as e:
+        app.logger.error(f"Failed to download model {model_name}:{version}: {e}")
+        app.switch_jobs.update(job, status="error", message=str(e), finished_at=time.time())
+        return
+    app.logger.info(f"Published model {ARTIFACT_MAP[model_name]}:{version} from {source} (serial {stamp['serial']})")
+    app.switch_jobs.update(
+        job, status="success", source=source, digest=stamp["digest"], serial=stamp["serial"], finished_at=time.time()
+    )
+
+
+def switch_executor() -> ThreadPoolExecutor:
+    # created on first use, i.e. in the worker and not in a preloading master
+    global _switch_executor
+    with _switch_executor_lock:
+        if _switch_executor is None:
+            _switch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-switch")
+        return _switch_executor
+
+
+def endpoint_label() -> str:
+    # the route pattern, not the path, so /games/<game_id>/stream is one series
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.endpoint_label = endpoint_label()
+    metrics.IN_FLIGHT.labels(g.endpoint_label).inc()
+
+
+@app.before_request
+def sync_published_model():
+    # between requests of this thread: the model a request starts with is the one it ends with
+    sync_model()
+
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        metrics.REQUEST_LATENCY.labels(g.endpoint_label, request.method, response.status_code).observe(
+            time.perf_counter() - start
         )
+    return response
 
-        # download model
-        artifact = run.use_artifact(f"{default_artifact}:{default_version}", type="model")
-        artifact_dir = artifact.download()
 
-        pkl_files = list(Path(artifact_dir).rglob("*.pkl"))
-        if not pkl_files:
-            raise FileNotFoundError("No .pkl file found in local repo")
+@app.teardown_request
+def end_request(exc):
+    label = g.pop("endpoint_label", None)
+    if label is not None:
+        metrics.IN_FLIGHT.labels(label).dec()
+    metrics.sync_cache("model", app.model_cache.stats())
+    metrics.sync_cache("prediction", app.prediction_cache.stats())
 
-        # save locally for future runs
-        joblib.dump(joblib.load(pkl_files[0]), local_path)
 
-        # load into app
-        app.model = joblib.load(local_path)
-        app.current_model_name = default_name
-        app.current_model_version = default_version
+_init_lock = threading.Lock()
+app.initialized = False
 
-        app.logger.info(f"Successfully downloaded and loaded default model {default_artifact}:{default_version}")
 
-    except Exception as e:
-        app.logger.error(f"Failed to automatically download default model: {e}")
+def init_app():
+    """Set up logging and load the default model, once per process (or once in the gunicorn master)."""
+    with _init_lock:
+        if app.initialized:
+            return
+        start = time.perf_counter()
+
+        # TODO: setup basic logging configuration
+        setup_logging(level=logging.INFO, **LOG_SETTINGS)
+
+        default_name = "distance"
+        default_version = "latest"
 
+        # TODO: any other initialization before the first request (e.g. load default model)
+        # a model published by a switch job wins over the default one
+        sync_model()
+        if app.active is None:
+            try:
+                source = activate_model(default_name, default_version, job_type="download-default")
+                app.logger.info(f"Loaded default model {default_name}:{default_version} from {source}")
+            except Exception as e:
+                app.logger.error(f"Failed to automatically download default model: {e}")
 
+        app.startup_seconds = time.perf_counter() - start
+        app.initialized = True
+
+
+@app.before_first_request
+def before_first_request():
+    """
+    Hook to handle any initialization before the first request (e.g. load model,
+    setup logging handler, etc.). A no-op when the app was preloaded.
+    """
+    init_app()
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: a model is loaded and warmed up, so /predict answers at full speed"""
+    active = app.active
+    ready = app.initialized and active is not None
+    response = {
+        "ready": ready,
+        "model": active.name if active else None,
+        "version": active.version if active else None,
+        "model_serial": app.model_serial,
+        "startup_seconds": getattr(app, "startup_seconds", None),
+    }
+    return jsonify(response), 200 if ready else 503
 
 
 @app.route("/logs", methods=["GET"])
 def logs():
-    """Reads data from the log file and returns them as the response"""
-    
+    """
+    Reads data from the log file and returns them as the response
+
+    ``?tail=N`` returns the last N lines (the default, with N=500);
+    ``?offset=K&limit=N`` returns N lines from line K, with ``next_offset``
+    to fetch the following page.
+    """
+    # non-integer values are treated as absent
+    tail = request.args.get("tail", type=int)
+    offset = request.args.get("offset", type=int)
+    limit = min(request.args.get("limit", LOGS_PAGE_SIZE, type=int), LOGS_MAX_PAGE_SIZE)
+
     # TODO: read the log file specified and return the data
     try:
         if not os.path.exists(LOG_FILE):
             response = {"logs": []}
+        elif offset is not None:
+            lines, next_offset = read_lines(LOG_FILE, max(offset, 0), max(limit, 0))
+            response = {"logs": lines, "offset": offset, "next_offset": next_offset}
         else:
-            with open(LOG_FILE, "r") as f:
-                lines = f.readlines()
-            response = {"logs": lines}
+            n = min(tail if tail is not None else LOGS_PAGE_SIZE, LOGS_MAX_PAGE_SIZE)
+            response = {"logs": tail_lines(LOG_FILE, n)}
     except Exception as e:
         app.logger.error(f"Error reading log file: {e}")
         abort(403, description="Could not read logs")
@@ -134,118 +486,266 @@ def download_registry_model():
     if workspace is None or model_name is None:
         abort(403, description="workspace and model fields are required")
 
-    # map flask model to wandb model
-    artifact_map = {
-        "distance": "logreg_distance_model",
-        "angle_from_net": "logreg_angle_model",
-        "distance_angle": "logreg_distance_angle_model",
-    }
-
-    if model_name not in artifact_map:
+    if model_name not in ARTIFACT_MAP:
         abort(403, description=f"Invalid model name {model_name}")
         
-    artifact_name = artifact_map[model_name]
+    artifact_name = ARTIFACT_MAP[model_name]
 
     # TODO: check to see if the model you are querying for is already downloaded
-    local_path = Path(f"{artifact_name}_{version}.pkl")
-    
     # TODO: if yes, load that model and write to the log about the model change.  
-    # eg: app.logger.info(<LOG STRING>)
-
-    if local_path.exists():
-        try:
-            app.model = joblib.load(local_path)
-            app.current_model_name = model_name
-            app.current_model_version = version
-            app.logger.info(f"Model already exists locally. Loaded {local_path}")
-            return jsonify({"status": "success", "model": model_name, "version": version})
-        except Exception as e:
-            app.logger.error(f"Local model exists but could not be loaded: {e}")
-    
     # TODO: if no, try downloading the model: if it succeeds, load that model and write to the log
     # about the model change. If it fails, write to the log about the failure and keep the 
     # currently loaded model
-    try:
-
-        run = wandb.init(project="ift6758-shot-prediction", job_type="download", entity="IFT67582025-B2",reinit=True)
-
-        artifact = run.use_artifact(f"{artifact_name}:{version}", type="model")
-        artifact_dir = artifact.download()
-
-        # find pkl file inside artifact directory
-        pkl_files = list(Path(artifact_dir).rglob("*.pkl"))
-        if not pkl_files:
-            raise FileNotFoundError("Artifact contains no .pkl file")
+    # the download runs in the background; every worker swaps the model in once it is published
+    job = app.switch_jobs.create(model_name, version)
+    app.logger.info(f"Switch job {job['job_id']} for {artifact_name}:{version}")
+    switch_executor().submit(run_switch_job, job, "IFT67582025-B2")
 
-        # download model localy
-        joblib.dump(joblib.load(pkl_files[0]), local_path)
-
-        # load newly downloaded model
-        app.model = joblib.load(local_path)
-        app.current_model_name = model_name
-        app.current_model_version = version
-
-        app.logger.info(f"Downloaded and loaded model {artifact_name}:{version}")
-        return jsonify({"status": "success", "model": model_name, "version": version})
-
-    except Exception as e:
-        app.logger.error(f"Failed to download model: {e}")
-        return jsonify({"status": "error", "message": str(e)}), 500
+    status_url = f"/download_registry_model/{job['job_id']}"
+    return jsonify({**job, "status_url": status_url}), 202, {"Location": status_url}
 
     # Tip: you can implement a "CometMLClient" similar to your App client to abstract all of this
     # logic and querying of the CometML servers away to keep it clean here
 
 
+@app.route("/download_registry_model/<job_id>", methods=["GET"])
+def download_registry_model_status(job_id):
+    """Status of a model switch job: pending, running, success or error (with a message)"""
+    job = app.switch_jobs.get(job_id)
+    if job is None:
+        abort(404, description=f"Unknown job {job_id}")
+    return jsonify(job)
+
+
 @app.route("/predict", methods=["POST"])
 def predict():
     """
     Handles POST requests made to http://IP_ADDRESS:PORT/predict
 
+    Optional query parameters ``model`` and ``version`` select a model from the
+    in-memory cache (loading its local pkl if needed) without changing the
+    default model used by other callers.
+
+    The body is either JSON (records or columns) or one of the binary formats
+    listed by /capabilities, chosen through the Content-Type header. Clients
+    sending ``Accept: application/x-float-matrix`` get the predictions back as
+    a one-column float64 matrix instead of JSON.
+
+    Rows with a missing (null/NaN) feature are not scored: their prediction is
+    ``null`` in JSON and NaN in the float matrix, and the other rows are
+    answered as usual.
+
     Returns predictions
     """
-    # get json data
-    json = request.get_json()
-    app.logger.info(json)
+    binary = request.mimetype in request_formats() and request.mimetype != JSON
+    with metrics.phase("parse"):
+        if binary:
+            body = request.get_data()
+            app.logger.info(f"Binary payload ({request.mimetype}, {len(body)} bytes)")
+        else:
+            # get json data
+            json = request.get_json()
+            excerpt = sample_payload(json, LOG_PAYLOAD_SAMPLE, LOG_PAYLOAD_MAX_CHARS)
+            if excerpt is not None:
+                app.logger.info(f"Predict payload: {excerpt}")
+
+    model_name = request.args.get("model")
+    version = request.args.get("version", "latest")
+
+    if model_name is None:
+        # one read: a switch published meanwhile does not affect this request
+        active = app.active
+        if active is None:
+            abort(403, description="No model loaded. Call /download_registry_model first.")
+        model_name, version, scorer = active.name, active.version, active.scorer
+    else:
+        if model_name not in ARTIFACT_MAP:
+            abort(403, description=f"Invalid model name {model_name}")
+        try:
+            entry = load_local_model(model_name, version)
+        except FileNotFoundError:
+            abort(403, description=f"Model {model_name}:{version} is not available. Call /download_registry_model first.")
+        scorer = entry.scorer
+
+    # TODO:
+    try:
+        required = FEATURE_MAP[model_name]
+
+        # parse the body straight into a float matrix (no DataFrame round trip)
+        try:
+            with metrics.phase("features"):
+                if binary:
+                    X = decode_features(body, request.mimetype, required)
+                else:
+                    X = features_to_array(json, required)
+        except KeyError as e:
+            abort(403, description=e.args[0])
+        metrics.PREDICT_ROWS.observe(len(X))
+
+        # predict probability w/ logistic regression model; rows with a missing feature get NaN
+        with metrics.phase("inference"):
+            probs = score_complete_rows(
+                lambda X: app.prediction_cache.score((model_name, version), scorer, X), X
+            )
+
+        with metrics.phase("serialize"):
+            if request.accept_mimetypes.best_match([JSON, FLOAT_MATRIX]) == FLOAT_MATRIX:
+                resp = Response(encode_float_matrix(["goal_prob"], probs), mimetype=FLOAT_MATRIX)
+                resp.headers["X-Model"] = model_name
+                resp.headers["X-Model-Version"] = version
+                return resp
+
+            # NaN is not JSON: rows that could not be scored are null
+            preds = [p if p == p else None for p in probs.tolist()]
+
+            response = {
+                "model": model_name,
+                "version": version,
+                "predictions": preds
+            }
+
+            return jsonify(response)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.logger.error(f"Prediction error: {e}")
+        abort(403, description=str(e))
+
+# shared per-game ingestion loops behind /games/<game_id>/stream
+LIVE_POLL_INTERVAL = float(os.environ.get("LIVE_POLL_INTERVAL", "10"))
+LIVE_IDLE_TIMEOUT = float(os.environ.get("LIVE_IDLE_TIMEOUT", "300"))
+# games polled at once, and open streams per worker: each stream holds a worker thread
+# for as long as it is connected, so keep LIVE_MAX_STREAMS below gunicorn's thread count
+LIVE_MAX_FEEDS = int(os.environ.get("LIVE_MAX_FEEDS", "16"))
+LIVE_MAX_STREAMS = int(os.environ.get("LIVE_MAX_STREAMS", "16"))
+GAME_ID_PATTERN = re.compile(r"\d{10}")
+NHL_API_BASE_URL = os.environ.get("NHL_API_BASE_URL", "https://api-web.nhle.com/v1")
+_live_games_lock = threading.Lock()
+_live_streams = threading.BoundedSemaphore(LIVE_MAX_STREAMS)
+
+
+def score_live_shots(X):
+    """Score build_features output (a DataFrame) with the current default model."""
+    # ingestion loops run outside requests, so they look for a published switch themselves
+    sync_model()
+    active = app.active
+    model_name, version, scorer = active.name, active.version, active.scorer
+    X = X[FEATURE_MAP[model_name]].to_numpy(dtype="float64")
+    probs = score_complete_rows(lambda X: app.prediction_cache.score((model_name, version), scorer, X), X)
+    return probs.tolist(), {"model": model_name, "version": version}
+
+
+def live_games():
+    """The LiveGameHub, created on first use so the client package is only imported then."""
+    with _live_games_lock:
+        if getattr(app, "live_games", None) is None:
+            from live_games import LiveGameHub
+
+            app.live_games = LiveGameHub(
+                score_live_shots,
+                poll_interval=LIVE_POLL_INTERVAL,
+                idle_timeout=LIVE_IDLE_TIMEOUT,
+                max_feeds=LIVE_MAX_FEEDS,
+                base_url=NHL_API_BASE_URL,
+            )
+        return app.live_games
+
+
+@app.route("/games/<game_id>/stream", methods=["GET"])
+def game_stream(game_id):
+    """
+    Streams scored shots of a game as they happen.
+
+    All viewers of a game share one upstream poll and one inference pass. By
+    default this is a Server-Sent Events stream (event: shots | removed |
+    final); ``?format=jsonl`` gives chunked JSON lines instead. Reconnecting
+    clients resume after the ``Last-Event-ID`` header (or ``?last_event_id=``).
 
-    if not hasattr(app, "model"):
+    Answers 503 once LIVE_MAX_STREAMS streams are open in this worker, or
+    when the game is not followed yet and LIVE_MAX_FEEDS games already are.
+    """
+    if app.active is None:
         abort(403, description="No model loaded. Call /download_registry_model first.")
+    if not GAME_ID_PATTERN.fullmatch(game_id):
+        abort(403, description=f"Invalid game id {game_id}")
 
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or 0
+    try:
+        last_id = int(last_id)
+    except ValueError:
+        abort(403, description=f"Invalid last event id {last_id}")
 
-    # TODO:
+    from live_games import TooManyFeeds
+
+    if not _live_streams.acquire(blocking=False):
+        abort(503, description=f"Too many open streams (max {LIVE_MAX_STREAMS}), retry later")
     try:
-        # convert json to dataframe
-        X = pd.DataFrame.from_dict(json)
-
-        # map flask model to wandb model
-        feature_map = {
-            "distance": ["distance"],
-            "angle_from_net": ["angle_from_net"],
-            "distance_angle": ["distance", "angle_from_net"],
-        }
+        feed = live_games().feed(game_id)
+    except Exception as e:
+        _live_streams.release()
+        if isinstance(e, TooManyFeeds):
+            abort(503, description=f"Too many games followed (max {LIVE_MAX_FEEDS}), retry later")
+        raise
+    jsonl = request.args.get("format") == "jsonl"
 
-        required = feature_map[app.current_model_name]
+    def generate():
+        for message in feed.follow(last_id):
+            if message is None:
+                yield "\n" if jsonl else ": keep-alive\n\n"
+                continue
+            seq, kind, data = message
+            if jsonl:
+                yield jsonlib.dumps({"id": seq, "event": kind, "data": data}) + "\n"
+            else:
+                yield f"id: {seq}\nevent: {kind}\ndata: {jsonlib.dumps(data)}\n\n"
 
-        # check for missing column
-        missing = [c for c in required if c not in X.columns]
-        if missing:
-            abort(403, description=f"Missing required features: {missing}")
+    mimetype = "application/x-ndjson" if jsonl else "text/event-stream"
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    resp = Response(stream_with_context(generate()), mimetype=mimetype, headers=headers)
+    # the slot is held until the connection closes, whether or not streaming started
+    resp.call_on_close(_live_streams.release)
+    return resp
 
-        X = X[required]
 
-        # predict probability w/ logistic regression model
-        preds = app.model.predict_proba(X)[:, 1].tolist()
+@app.route("/games", methods=["GET"])
+def games():
+    """Lists the games with a live ingestion loop and their viewer counts"""
+    hub = getattr(app, "live_games", None)
+    return jsonify(hub.stats() if hub is not None else {})
 
-        response = {
-            "model": app.current_model_name,
-            "version": app.current_model_version,
-            "predictions": preds
-        }
 
-        return jsonify(response)
+@app.route("/capabilities", methods=["GET"])
+def capabilities():
+    """Lists the /predict body formats this server understands"""
+    return jsonify({"predict_formats": request_formats(), "response_formats": [JSON, FLOAT_MATRIX]})
+
+
+@app.route("/model_cache", methods=["GET"])
+def model_cache_stats():
+    """Returns hit/miss counts and contents of the in-memory model cache"""
+    return jsonify(app.model_cache.stats())
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Request, phase, model-load and cache metrics in Prometheus text format"""
+    scrape = metrics.render()
+    if scrape is None:
+        abort(501, description="prometheus_client is not installed")
+    body, content_type = scrape
+    return Response(body, content_type=content_type)
+
+
+@app.route("/prediction_cache", methods=["GET"])
+def prediction_cache_stats():
+    """Returns hit/miss counts of the prediction cache, per feature row"""
+    return jsonify(app.prediction_cache.stats())
+
+
+if PRELOAD_MODEL:
+    init_app()
 
-    except Exception as e:
-        app.logger.error(f"Prediction error: {e}")
-        abort(403, description=str(e))
 
 if __name__ == "__main__":
     app.run(host="127.0.0.1", port=5000, debug=False)
\ No newline at end of file
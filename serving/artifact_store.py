@@ -0,0 +1,116 @@
+"""
+Content-addressed local store for downloaded model artifacts.
+
+    <root>/objects/<sha256>.pkl    one file per distinct model, never rewritten
+    <root>/manifest.json           "<artifact>:<version>" -> digest, path, fetched_at
+
+Files are hardlinked (or copied, then atomically renamed) into the store as
+they come out of wandb, so a model is never unpickled just to be written back
+to disk. Pinned versions never expire; "latest" is trusted for ``ttl`` seconds
+before the registry is asked again. Models are loaded with joblib's
+``mmap_mode="r"`` so that gunicorn workers share the pages of their arrays.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: waitress runs a single process anyway
+    fcntl = None
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ArtifactStore:
+    def __init__(self, root: str = "model_store", ttl: float = 3600.0):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.manifest_path = self.root / "manifest.json"
+        self.ttl = ttl
+        self.objects.mkdir(parents=True, exist_ok=True)
+
+    def resolve(self, artifact_name: str, version: str, allow_stale: bool = False) -> Optional[Path]:
+        """
+        Return the local path of ``artifact_name:version`` without touching the
+        network, or None if it is unknown (or "latest" is older than ``ttl``).
+        """
+        entry = self._read_manifest().get(f"{artifact_name}:{version}")
+        if entry is None:
+            return None
+
+        path = self.objects / entry["path"]
+        if not path.exists():
+            return None
+        if version == "latest" and not allow_stale and time.time() - entry["fetched_at"] > self.ttl:
+            return None
+        return path
+
+    def put(self, artifact_name: str, version: str, src: Path) -> Path:
+        """Link ``src`` into the store under its content digest and index it."""
+        src = Path(src)
+        digest = file_digest(src)
+        dest = self.objects / f"{digest}{src.suffix}"
+
+        if not dest.exists():
+            tmp = self.objects / f".{digest}.{os.getpid()}.tmp"
+            try:
+                os.link(src, tmp)
+            except OSError:
+                # different filesystem or no hardlink support
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+
+        with self._locked():
+            manifest = self._read_manifest()
+            manifest[f"{artifact_name}:{version}"] = {
+                "digest": digest,
+                "path": dest.name,
+                "fetched_at": time.time(),
+            }
+            self._write_manifest(manifest)
+        return dest
+
+    @staticmethod
+    def load(path: Path):
+        """Load a stored model, memory-mapping its numpy arrays read-only."""
+        import joblib
+
+        return joblib.load(path, mmap_mode="r")
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_manifest(self, manifest: Dict):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
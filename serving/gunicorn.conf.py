@@ -0,0 +1,52 @@
+"""
+gunicorn settings for the serving app:
+
+    $ gunicorn --config gunicorn.conf.py --bind 0.0.0.0:5000 app:app
+
+Gives every run a clean PROMETHEUS_MULTIPROC_DIR, so /metrics aggregates
+the samples of all workers, and drops the live gauges of workers that exit.
+The master writes the log file for every worker.
+
+The app is preloaded: the default model is loaded and warmed up once in the
+master and the forked workers share its pages copy-on-write. PRELOAD_MODEL=0
+goes back to loading it in each worker on its first request.
+"""
+import os
+import shutil
+import tempfile
+
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
+# every open /games/<id>/stream holds a thread; past half of them the app answers 503,
+# so /predict and /readyz always have threads left
+os.environ.setdefault("LIVE_MAX_STREAMS", str(max(1, threads // 2)))
+
+os.environ.setdefault("PRELOAD_MODEL", "1")
+preload_app = os.environ["PRELOAD_MODEL"] == "1"
+
+# done when the config is read, i.e. before the app (and prometheus_client) is imported
+# anywhere; the marker keeps a config reload (HUP) from wiping live samples
+if not os.environ.get("XG_METRICS_DIR_READY"):
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        # samples left over from a previous run would be added to this one
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+    else:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+    os.environ["XG_METRICS_DIR_READY"] = "1"
+
+
+def on_starting(server):
+    # the master owns FLASK_LOG; workers forked from it send it their records (see log_utils)
+    import log_utils
+
+    log_utils.setup_logging(**log_utils.env_settings())
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
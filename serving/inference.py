@@ -0,0 +1,265 @@
+"""
+Fast inference helpers for the /predict endpoint.
+
+Requests are parsed straight into a contiguous float64 matrix instead of going
+through ``pd.DataFrame.from_dict``, and binary linear models (our logistic
+regressions) are scored with a dot product and a sigmoid instead of
+``predict_proba``. Anything else falls back to ``predict_proba``.
+
+Models without that fast path, but with one or two bounded inputs, can be
+compiled into a precomputed probability grid (``make_grid_scorer``), answered
+by array indexing and linear/bilinear interpolation. The grid is approximate
+and slower than the dot product, so it is no use for linear models.
+"""
+import itertools
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+Payload = Union[List[Dict], Dict[str, Union[List, Dict]]]
+# (low, high, step) of one feature
+GridAxis = Tuple[float, float, float]
+
+# rows used to check that the fast path reproduces predict_proba on load
+_PROBE = np.array(
+    [[0.0, 0.0], [1.0, 5.0], [12.0, 33.5], [35.0, 90.0], [60.0, 120.0], [189.0, 179.9]]
+)
+
+
+def features_to_array(payload: Payload, columns: Sequence[str]) -> np.ndarray:
+    """
+    Parse a /predict JSON payload into a C-contiguous (n_rows, n_columns) array.
+
+    Args:
+        payload: either a list of records (``DataFrame.to_dict(orient="records")``)
+            or a dict of columns (``DataFrame.to_dict()`` / ``to_json()``)
+        columns: feature columns to extract, in model order
+
+    Returns:
+        float64 array; null values become NaN, as they would with pandas.
+
+    Raises:
+        KeyError: if some of ``columns`` are absent from the payload.
+    """
+    if isinstance(payload, list):
+        return _records_to_array(payload, columns)
+    if isinstance(payload, dict):
+        return _columns_to_array(payload, columns)
+    raise ValueError(f"Unsupported payload type: {type(payload).__name__}")
+
+
+def _records_to_array(rows: List[Dict], columns: Sequence[str]) -> np.ndarray:
+    X = np.empty((len(rows), len(columns)), dtype=np.float64)
+    if not rows:
+        return X
+
+    first = rows[0]
+    missing = [c for c in columns if c not in first and not any(c in r for r in rows)]
+    if missing:
+        raise KeyError(f"Missing required features: {missing}")
+
+    for j, col in enumerate(columns):
+        X[:, j] = np.array([row.get(col) for row in rows], dtype=np.float64)
+    return X
+
+
+def _columns_to_array(data: Dict, columns: Sequence[str]) -> np.ndarray:
+    missing = [c for c in columns if c not in data]
+    if missing:
+        raise KeyError(f"Missing required features: {missing}")
+
+    cols = [data[c] for c in columns]
+    if any(isinstance(col, dict) for col in cols):
+        # {column: {index: value}} as produced by DataFrame.to_json(); only
+        # take the fast route when every column shares the same index order
+        index = list(cols[0].keys()) if isinstance(cols[0], dict) else None
+        if index is None or any(
+            not isinstance(col, dict) or list(col.keys()) != index for col in cols
+        ):
+            return _pandas_to_array(data, columns)
+        cols = [list(col.values()) for col in cols]
+
+    n_rows = len(cols[0]) if cols else 0
+    X = np.empty((n_rows, len(columns)), dtype=np.float64)
+    for j, col in enumerate(cols):
+        if len(col) != n_rows:
+            raise ValueError("All feature columns must have the same length")
+        X[:, j] = np.array(col, dtype=np.float64)
+    return X
+
+
+def _pandas_to_array(data: Dict, columns: Sequence[str]) -> np.ndarray:
+    import pandas as pd
+
+    X = pd.DataFrame.from_dict(data)
+    return np.ascontiguousarray(X[list(columns)].to_numpy(dtype=np.float64))
+
+
+def make_scorer(model) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Return a function mapping a feature matrix to P(goal) for ``model``.
+
+    Binary linear models get a direct ``expit(X @ coef + intercept)`` scorer,
+    which is only used if it reproduces ``predict_proba`` on a probe matrix.
+    """
+    linear = linear_scorer(model)
+    if linear is not None:
+        return linear
+    return lambda X: _predict_proba(model, X)
+
+
+def linear_scorer(model) -> Callable[[np.ndarray], np.ndarray] | None:
+    """The exact ``expit`` fast path of ``model``, or None if it has none."""
+    linear = _linear_scorer(model)
+    if linear is not None and _agrees_with_model(model, linear):
+        return linear
+    return None
+
+
+def _linear_scorer(model) -> Callable[[np.ndarray], np.ndarray] | None:
+    coef = getattr(model, "coef_", None)
+    intercept = getattr(model, "intercept_", None)
+    classes = getattr(model, "classes_", None)
+    if coef is None or intercept is None or classes is None or len(classes) != 2:
+        return None
+    if not hasattr(model, "predict_proba") or np.ndim(coef) != 2 or coef.shape[0] != 1:
+        return None
+
+    # scipy is only imported once a model is loaded (unpickling sklearn imports it anyway)
+    from scipy.special import expit
+
+    w = np.ascontiguousarray(coef[0], dtype=np.float64)
+    b = float(intercept[0])
+
+    def score(X: np.ndarray) -> np.ndarray:
+        if X.shape[1] != w.shape[0]:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but model expects {w.shape[0]} features"
+            )
+        z = X @ w
+        z += b
+        return expit(z, out=z)
+
+    return score
+
+
+def score_complete_rows(score: Callable[[np.ndarray], np.ndarray], X: np.ndarray) -> np.ndarray:
+    """
+    ``score(X)`` for the rows without a missing (NaN) feature and NaN for the
+    others, which no model is asked to score (``predict_proba`` rejects them).
+    """
+    incomplete = np.isnan(X).any(axis=1)
+    if not incomplete.any():
+        return score(X)
+    probs = np.full(len(X), np.nan)
+    if not incomplete.all():
+        probs[~incomplete] = score(X[~incomplete])
+    return probs
+
+
+def _agrees_with_model(model, scorer: Callable[[np.ndarray], np.ndarray]) -> bool:
+    n_features = getattr(model, "n_features_in_", None) or model.coef_.shape[1]
+    if n_features > _PROBE.shape[1]:
+        return False
+    probe = np.ascontiguousarray(_PROBE[:, :n_features])
+    try:
+        return np.allclose(scorer(probe), _predict_proba(model, probe), rtol=1e-12, atol=0)
+    except Exception:
+        return False
+
+
+def _predict_proba(model, X: np.ndarray) -> np.ndarray:
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        # keep sklearn from warning about a model fitted on a DataFrame
+        import pandas as pd
+
+        X = pd.DataFrame(X, columns=names)
+    return model.predict_proba(X)[:, 1]
+
+
+class GridScorer:
+    """
+    P(goal) looked up in a dense grid of ``predict_proba`` values, one axis
+    per feature. Points on the grid are read back exactly; points between
+    grid nodes are interpolated (linear in 1-D, bilinear in 2-D). Rows
+    outside the grid, or with NaN, go to ``fallback``.
+    """
+
+    def __init__(self, model, axes: Sequence[GridAxis], fallback: Callable[[np.ndarray], np.ndarray]):
+        self.lo = np.array([lo for lo, _, _ in axes], dtype=np.float64)
+        self.step = np.array([step for _, _, step in axes], dtype=np.float64)
+        self.shape = tuple(int(round((hi - lo) / step)) + 1 for lo, hi, step in axes)
+        if min(self.shape) < 2:
+            raise ValueError("Every grid axis needs at least two points")
+        self.hi = self.lo + self.step * (np.array(self.shape) - 1)
+        self.fallback = fallback
+
+        nodes = [lo + step * np.arange(n) for lo, step, n in zip(self.lo, self.step, self.shape)]
+        mesh = np.meshgrid(*nodes, indexing="ij")
+        X = np.stack([m.ravel() for m in mesh], axis=1)
+        self.grid = _predict_proba(model, X).reshape(self.shape)
+        self.max_error = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.grid.nbytes
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        if X.shape[1] != len(self.shape):
+            raise ValueError(
+                f"X has {X.shape[1]} features, but model expects {len(self.shape)} features"
+            )
+        # NaN compares False, so it lands outside the grid
+        inside = np.all((X >= self.lo) & (X <= self.hi), axis=1)
+        if inside.all():
+            return self._interpolate(X)
+
+        out = np.empty(len(X), dtype=np.float64)
+        out[inside] = self._interpolate(X[inside])
+        out[~inside] = self.fallback(np.ascontiguousarray(X[~inside]))
+        return out
+
+    def _interpolate(self, X: np.ndarray) -> np.ndarray:
+        t = (X - self.lo) / self.step
+        # the last node belongs to the cell before it
+        i = np.minimum(np.floor(t).astype(np.intp), np.array(self.shape) - 2)
+        f = t - i
+        out = np.zeros(len(X), dtype=np.float64)
+        for corner in itertools.product((0, 1), repeat=len(self.shape)):
+            weight = np.ones(len(X), dtype=np.float64)
+            for k, c in enumerate(corner):
+                weight *= f[:, k] if c else 1 - f[:, k]
+            out += weight * self.grid[tuple(i[:, k] + c for k, c in enumerate(corner))]
+        return out
+
+
+def make_grid_scorer(
+    model,
+    axes: Sequence[GridAxis],
+    fallback: Callable[[np.ndarray], np.ndarray] = None,
+    tolerance: float = 1e-4,
+    max_cells: int = 1_000_000,
+) -> GridScorer | None:
+    """
+    Compile ``model`` into a GridScorer over ``axes``.
+
+    The grid is checked against ``predict_proba`` at the centre of every cell,
+    where interpolation is least accurate. Returns None if the grid would be
+    larger than ``max_cells`` or its error is above ``tolerance``.
+    """
+    fallback = fallback or make_scorer(model)
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is not None and n_features != len(axes):
+        return None
+    if np.prod([int(round((hi - lo) / step)) + 1 for lo, hi, step in axes]) > max_cells:
+        return None
+
+    scorer = GridScorer(model, axes, fallback)
+    centres = [lo + step * (np.arange(n - 1) + 0.5) for lo, step, n in zip(scorer.lo, scorer.step, scorer.shape)]
+    mesh = np.meshgrid(*centres, indexing="ij")
+    probe = np.stack([m.ravel() for m in mesh], axis=1)
+    scorer.max_error = float(np.max(np.abs(scorer(probe) - _predict_proba(model, probe))))
+    if scorer.max_error > tolerance:
+        return None
+    return scorer
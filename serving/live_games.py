@@ -0,0 +1,205 @@
+"""
+Shared live-game ingestion for the /games/<game_id>/stream endpoint.
+
+Each followed game gets a single background thread that polls the NHL feed
+with ``GameClient``, builds features with ``build_features``, and scores new
+shots in-process. The scored shots go into an in-memory log that every viewer
+of that game reads from, so N viewers cost one upstream poll and one inference
+pass rather than N. A game's loop stops once the game is final, or after
+``idle_timeout`` seconds with no viewers. At most ``max_feeds`` games are
+polled at once.
+
+Each gunicorn worker process runs its own loops. Run the app with a single
+worker and several threads (``--worker-class gthread``) to get exactly one
+loop per game.
+"""
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import pandas as pd
+
+from ift6758.client.game_client import GameClient
+from ift6758.client.game_store import FINAL_STATES
+
+logger = logging.getLogger(__name__)
+
+# (seq, kind, data); kind is "shots", "removed" or "final"
+Message = Tuple[int, str, object]
+
+
+class GameFeed:
+
+    def __init__(
+        self,
+        game_id: str,
+        game_client: GameClient,
+        score_fn: Callable[[pd.DataFrame], Tuple[List[float], Dict]],
+        poll_interval: float = 10,
+        idle_timeout: float = 300,
+        max_messages: int = 10_000,
+        start_seq: int = 0,
+    ):
+        self.game_id = game_id
+        self.game_client = game_client
+        self.score_fn = score_fn
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+
+        self.messages: List[Message] = []
+        # sequence numbers keep growing across restarts so Last-Event-ID stays valid
+        self.seq = start_seq
+        self.viewers = 0
+        self.stopped = False
+        self.finished = False
+        self._last_viewer = time.monotonic()
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, name=f"game-feed-{game_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.stopped = True
+        self._wake.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def publish(self, kind: str, data):
+        with self._cond:
+            self.seq += 1
+            self.messages.append((self.seq, kind, data))
+            if len(self.messages) > self.max_messages:
+                del self.messages[: len(self.messages) - self.max_messages]
+            self._cond.notify_all()
+
+    def _run(self):
+        while not self.stopped:
+            try:
+                final = self._poll_once()
+            except Exception as e:
+                logger.error(f"Live feed for game {self.game_id} failed to poll: {e}")
+                final = False
+
+            if final:
+                self.finished = True
+                self.publish("final", {"game_id": self.game_id})
+                break
+            with self._cond:
+                idle = self.viewers == 0 and time.monotonic() - self._last_viewer > self.idle_timeout
+            if idle:
+                logger.info(f"No viewers for game {self.game_id}, stopping its feed")
+                break
+            self._wake.wait(self.poll_interval)
+
+        self.game_client.reset(self.game_id)
+        self.stop()
+
+    def _poll_once(self) -> bool:
+        poll = self.game_client.poll(self.game_id)
+
+        if not poll.features.empty:
+            preds, meta = self.score_fn(poll.features)
+            scored = poll.features.assign(goal_prob=preds)
+            # to_json turns numpy types and NaN into plain JSON values
+            records = json.loads(scored.to_json(orient="records"))
+            self.publish("shots", {**meta, "events": records})
+        if poll.removed_event_ids:
+            self.publish("removed", {"event_ids": poll.removed_event_ids})
+
+        self.game_client.commit(poll)
+        return poll.payload is not None and poll.payload.get("gameState") in FINAL_STATES
+
+    def follow(self, last_seq: int = 0, keepalive: float = 15) -> Iterator[Message]:
+        """
+        Yield every message after ``last_seq``, then new ones as they are
+        published, until the feed stops. Yields None when nothing happened for
+        ``keepalive`` seconds so the caller can keep the connection open.
+        """
+        with self._cond:
+            self.viewers += 1
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: self.stopped or (self.messages and self.messages[-1][0] > last_seq),
+                        timeout=keepalive,
+                    )
+                    pending = [m for m in self.messages if m[0] > last_seq]
+                    stopped = self.stopped
+
+                if pending:
+                    last_seq = pending[-1][0]
+                    yield from pending
+                elif stopped:
+                    return
+                else:
+                    yield None
+        finally:
+            with self._cond:
+                self.viewers -= 1
+                self._last_viewer = time.monotonic()
+
+
+class TooManyFeeds(RuntimeError):
+    """Raised when following one more game would exceed ``LiveGameHub.max_feeds``."""
+
+
+class LiveGameHub:
+    """Creates one GameFeed per followed game and hands it to every viewer."""
+
+    def __init__(
+        self,
+        score_fn,
+        poll_interval: float = 10,
+        idle_timeout: float = 300,
+        max_feeds: int = 16,
+        **game_client_kwargs,
+    ):
+        self.score_fn = score_fn
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.max_feeds = max_feeds
+        self.game_client = GameClient(serving_client=None, **game_client_kwargs)
+        self.feeds: Dict[str, GameFeed] = {}
+        self._lock = threading.Lock()
+
+    def feed(self, game_id: str) -> GameFeed:
+        with self._lock:
+            feed = self.feeds.get(game_id)
+            # a finished game keeps serving its log without polling
+            if feed is not None and (not feed.stopped or feed.finished):
+                return feed
+            return self._start(game_id, start_seq=feed.seq if feed is not None else 0)
+
+    def _start(self, game_id: str, start_seq: int = 0) -> GameFeed:
+        # forget feeds nobody is watching any more
+        for other_id, other in list(self.feeds.items()):
+            if other.stopped and other.viewers == 0:
+                del self.feeds[other_id]
+        # each running feed is a thread polling the NHL API until its game ends or goes idle
+        running = sum(not feed.stopped for feed in self.feeds.values())
+        if running >= self.max_feeds:
+            raise TooManyFeeds(f"Already following {running} games")
+
+        logger.info(f"Starting live feed for game {game_id}")
+        feed = GameFeed(
+            game_id,
+            self.game_client,
+            self.score_fn,
+            poll_interval=self.poll_interval,
+            idle_timeout=self.idle_timeout,
+            start_seq=start_seq,
+        )
+        self.feeds[game_id] = feed
+        return feed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                game_id: {"viewers": feed.viewers, "messages": feed.seq, "stopped": feed.stopped}
+                for game_id, feed in self.feeds.items()
+            }
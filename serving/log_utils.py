@@ -0,0 +1,123 @@
+"""
+Logging for the serving app: records go through a queue to a background
+thread that writes a size-rotated file, so request threads never wait on
+disk. /logs reads pages of that file without loading it whole.
+
+One process owns the file: the first to call ``setup_logging``, i.e. the
+gunicorn master (gunicorn.conf.py sets logging up there, preloaded app or
+not). The queue is a ``multiprocessing.SimpleQueue`` (a pipe) inherited by
+the forked workers, which only put their records on it; the owner's thread writes and
+rotates the file alone, so no line is lost or interleaved across rollovers.
+Without gunicorn.conf.py and without preloading, every worker would set up
+its own file handler: run a single worker then.
+"""
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Tuple
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener = None
+_owner_pid = None
+
+
+class _PipeQueueHandler(QueueHandler):
+    # multiprocessing.SimpleQueue: put() writes the pipe under a lock shared across fork, with
+    # no feeder thread (a multiprocessing.Queue's does not survive os.fork in the child)
+    def enqueue(self, record):
+        self.queue.put(record)
+
+
+class _PipeQueueListener(QueueListener):
+    def dequeue(self, block):
+        return self.queue.get()
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def env_settings() -> Dict:
+    """``setup_logging`` arguments from FLASK_LOG, LOG_MAX_MB and LOG_BACKUPS."""
+    return {
+        "log_file": os.environ.get("FLASK_LOG", "flask.log"),
+        "max_bytes": int(float(os.environ.get("LOG_MAX_MB", "10")) * 1024 * 1024),
+        "backups": int(os.environ.get("LOG_BACKUPS", "5")),
+    }
+
+
+def setup_logging(log_file: str, level: int = logging.INFO, max_bytes: int = 10 * 1024 * 1024, backups: int = 5):
+    """
+    Route the root logger through a queue to a rotating ``log_file``. Safe to
+    call twice, and a no-op in processes forked after the first call: they
+    already log to the owner's queue.
+    """
+    global _listener, _owner_pid
+    if _listener is not None:
+        return
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    records = multiprocessing.SimpleQueue()
+    _listener = _PipeQueueListener(records, file_handler, respect_handler_level=True)
+    _listener.start()
+    _owner_pid = os.getpid()
+    atexit.register(_stop_listener)
+
+    root = logging.getLogger()
+    root.addHandler(_PipeQueueHandler(records))
+    root.setLevel(level)
+
+
+def _stop_listener():
+    # forked children inherit this atexit hook; only the owner has a thread to stop, and a
+    # child putting the stop sentinel on the shared queue would end the owner's listener
+    if _listener is not None and os.getpid() == _owner_pid:
+        _listener.stop()
+
+
+def sample_payload(payload, rate: float, max_chars: int) -> str | None:
+    """
+    A loggable excerpt of a request payload for a ``rate`` fraction of calls
+    (None for the others), cut to ``max_chars`` characters.
+    """
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return None
+    text = json.dumps(payload, default=str)
+    if len(text) > max_chars:
+        text = f"{text[:max_chars]}... ({len(text)} chars)"
+    return text
+
+
+def read_lines(path: str, offset: int = 0, limit: int = 500) -> Tuple[List[str], int]:
+    """Lines ``offset``..``offset+limit`` of a file, streamed; also the offset after them."""
+    lines = []
+    with open(path, "r", errors="replace") as f:
+        for i, line in enumerate(f):
+            if i >= offset + limit:
+                break
+            if i >= offset:
+                lines.append(line)
+    return lines, offset + len(lines)
+
+
+def tail_lines(path: str, n: int, block_size: int = 64 * 1024) -> List[str]:
+    """The last ``n`` lines of a file, read backwards block by block."""
+    if n <= 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        data = b""
+        # n lines need n + 1 newlines, unless the start of the file is reached
+        while end > 0 and data.count(b"\n") <= n:
+            start = max(0, end - block_size)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+    lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+    return lines[-n:]
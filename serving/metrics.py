@@ -0,0 +1,107 @@
+"""
+Prometheus metrics for the serving app, exposed on /metrics.
+
+Under gunicorn every worker writes its samples to ``PROMETHEUS_MULTIPROC_DIR``
+(set up by gunicorn.conf.py) and /metrics merges the files of all workers, so
+any worker can answer a scrape. Without the variable the process registry is
+used. When prometheus_client is not installed every metric is a no-op.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+LOAD_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = Histogram(
+        "xg_request_duration_seconds", "Request latency", ["endpoint", "method", "status"],
+        buckets=LATENCY_BUCKETS,
+    )
+    PREDICT_PHASE_LATENCY = Histogram(
+        "xg_predict_phase_duration_seconds", "/predict latency per phase", ["phase"],
+        buckets=LATENCY_BUCKETS,
+    )
+    PREDICT_ROWS = Histogram("xg_predict_rows", "Rows scored per /predict request", buckets=ROW_BUCKETS)
+    IN_FLIGHT = Gauge(
+        "xg_requests_in_flight", "Requests being handled", ["endpoint"], multiprocess_mode="livesum"
+    )
+    MODEL_LOAD_LATENCY = Histogram(
+        "xg_model_load_duration_seconds", "Model download/load time", ["source"], buckets=LOAD_BUCKETS
+    )
+    CACHE_EVENTS = Counter("xg_cache_events_total", "Cache lookups and evictions", ["cache", "event"])
+    CACHE_SIZE = Gauge("xg_cache_entries", "Entries held per cache", ["cache"], multiprocess_mode="livesum")
+else:
+    REQUEST_LATENCY = PREDICT_PHASE_LATENCY = PREDICT_ROWS = IN_FLIGHT = _NoopMetric()
+    MODEL_LOAD_LATENCY = CACHE_EVENTS = CACHE_SIZE = _NoopMetric()
+
+# highest cache counters pushed by this process, to turn totals into increments; request
+# threads sync concurrently, so the read-modify-write of each counter happens under the lock
+_synced: Dict[Tuple[str, str], int] = {}
+_synced_lock = threading.Lock()
+
+
+@contextmanager
+def timed(histogram):
+    """Observe the duration of the block on ``histogram`` (a labelled child or a plain one)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+def phase(name: str):
+    return timed(PREDICT_PHASE_LATENCY.labels(name))
+
+
+def sync_cache(cache: str, stats: Dict):
+    """Publish the hit/miss/eviction totals and size from a cache's ``stats()``."""
+    with _synced_lock:
+        for event in ("hits", "misses", "evictions"):
+            total = stats.get(event, 0)
+            delta = total - _synced.get((cache, event), 0)
+            # totals only grow: an older snapshot (delta <= 0) must not move the mark back
+            if delta > 0:
+                CACHE_EVENTS.labels(cache, event).inc(delta)
+                _synced[(cache, event)] = total
+    CACHE_SIZE.labels(cache).set(stats.get("size", 0))
+
+
+def render() -> Tuple[bytes, str] | None:
+    """(body, content type) of a scrape, or None without prometheus_client."""
+    if prometheus_client is None:
+        return None
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
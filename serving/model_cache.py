@@ -0,0 +1,105 @@
+"""
+Bounded in-process cache of loaded models, keyed by (model, version).
+
+Entries are evicted least-recently-used first once either the number of
+models or their estimated memory footprint goes over budget.
+"""
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from inference import make_scorer
+
+ModelKey = Tuple[str, str]
+
+
+class CachedModel(NamedTuple):
+    model: object
+    scorer: Callable
+    nbytes: int
+
+
+def estimate_nbytes(model) -> int:
+    """Approximate in-memory size of a model by the size of its pickle."""
+    try:
+        return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class ModelCache:
+    def __init__(
+        self,
+        max_models: int = 4,
+        max_bytes: Optional[int] = None,
+        scorer_factory: Callable[[ModelKey, object], Callable] = None,
+    ):
+        """``scorer_factory(key, model)`` builds the scorer of each new entry."""
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.scorer_factory = scorer_factory or (lambda key, model: make_scorer(model))
+        self._entries: "OrderedDict[ModelKey, CachedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: ModelKey) -> Optional[CachedModel]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: ModelKey, model) -> CachedModel:
+        scorer = self.scorer_factory(key, model)
+        nbytes = estimate_nbytes(model) + getattr(scorer, "nbytes", 0)
+        entry = CachedModel(model=model, scorer=scorer, nbytes=nbytes)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            self._evict()
+        return entry
+
+    def get_or_load(self, key: ModelKey, loader: Callable[[], object]) -> CachedModel:
+        """Return the cached entry for ``key``, calling ``loader()`` on a miss."""
+        entry = self.get(key)
+        if entry is None:
+            entry = self.put(key, loader())
+        return entry
+
+    def invalidate(self, key: ModelKey):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _evict(self):
+        # always keep the most recent entry, even if it alone is over budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "models": [f"{name}:{version}" for name, version in self._entries],
+                "size": len(self._entries),
+                "max_models": self.max_models,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
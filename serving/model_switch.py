@@ -0,0 +1,131 @@
+"""
+Model switches shared by every gunicorn worker.
+
+    <root>/current.json         the published default model: name, version, store object, serial
+    <root>/jobs/<job_id>.json   status of each background switch job
+
+A switch job downloads (or finds) the model in the artifact store, checks
+that it loads, then publishes it in ``current.json``. Every worker looks at
+that file before each request (one ``stat`` unless it changed) and swaps the
+new model in when the serial moved, so all workers converge on the same model
+without any of them blocking on the download. Job files let any worker report
+the status of a job started by another. Workers on several hosts need the
+directory on a shared volume.
+"""
+import json
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process
+    fcntl = None
+
+JOB_TTL = 24 * 3600
+
+
+def _write_json(path: Path, data: Dict):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class ModelStamp:
+    """The shared ``current.json``, re-read only when the file was replaced."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / "current.json"
+        self._cache = (None, None)
+
+    def read(self) -> Optional[Dict]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        version = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._cache[0] != version:
+            try:
+                with open(self.path) as f:
+                    self._cache = (version, json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+        return self._cache[1]
+
+    def publish(self, model: str, version: str, path: Path) -> Dict:
+        """Point every worker at ``path``, an object of the artifact store."""
+        with self._locked():
+            current = self.read() or {}
+            stamp = {
+                "model": model,
+                "version": version,
+                "digest": path.stem,
+                "path": path.name,
+                "serial": current.get("serial", 0) + 1,
+                "published_at": time.time(),
+            }
+            _write_json(self.path, stamp)
+        return stamp
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.root / ".stamp.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class JobStore:
+    """Status files of switch jobs: pending -> running -> success | error."""
+
+    def __init__(self, root: str):
+        self.root = Path(root) / "jobs"
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def create(self, model: str, version: str) -> Dict:
+        self._prune()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "pending",
+            "model": model,
+            "version": version,
+            "created_at": time.time(),
+        }
+        _write_json(self.root / f"{job['job_id']}.json", job)
+        return job
+
+    def update(self, job: Dict, **fields) -> Dict:
+        job = {**job, **fields}
+        _write_json(self.root / f"{job['job_id']}.json", job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        # job ids are hex; anything else cannot name a job file
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self.root / f"{job_id}.json") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _prune(self):
+        cutoff = time.time() - JOB_TTL
+        for path in self.root.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,111 @@
+"""
+Optional memoized predictions keyed by (model, version, feature row).
+
+Live games re-send the same shots over and over (every model switch in the
+Streamlit app re-scores the whole game, and several dashboards send identical
+rows). Keys are the exact feature rows by default, so a cached answer is what
+the model returned for that very row. With ``decimals`` set, only the keys are
+rounded: rows within rounding of each other share the answer of the first one
+scored, which trades exactness for hits.
+
+A lookup costs a dictionary probe per distinct row, far more than the linear
+scorers themselves on a large batch, so batches of more than ``max_batch`` rows
+skip the cache and go straight to the scorer.
+
+Entries of a model are dropped as soon as a different scorer is seen for its
+(model, version), e.g. after "latest" was re-downloaded.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+ModelKey = Tuple[str, str]
+
+
+class PredictionCache:
+    def __init__(self, max_entries: int = 0, decimals: Optional[int] = None, max_batch: int = 256):
+        self.max_entries = max_entries
+        self.decimals = decimals
+        self.max_batch = max_batch
+        self._entries: "OrderedDict[tuple, float]" = OrderedDict()
+        self._scorers: Dict[ModelKey, Callable] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def score(self, model_key: ModelKey, scorer: Callable, X: np.ndarray) -> np.ndarray:
+        """``scorer(X)``, answering repeated rows from the cache."""
+        if not self.enabled or len(X) == 0 or len(X) > self.max_batch:
+            return scorer(X)
+
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        keyed = X if self.decimals is None else np.round(X, self.decimals)
+        # each distinct row is looked up once, however often it repeats in the batch;
+        # a void view makes rows 1-d scalars, much cheaper to unique than axis=0
+        rows_view = np.ascontiguousarray(keyed).view(np.dtype((np.void, keyed.dtype.itemsize * keyed.shape[1])))
+        _, first, inverse = np.unique(rows_view.ravel(), return_index=True, return_inverse=True)
+        rows = X[first]
+        keys = [(*model_key, row.tobytes()) for row in keyed[first]]
+        probs = np.empty(len(rows), dtype=np.float64)
+        missing = []
+
+        with self._lock:
+            if self._scorers.get(model_key) is not scorer:
+                self._drop(model_key)
+                self._scorers[model_key] = scorer
+            for i, key in enumerate(keys):
+                prob = self._entries.get(key)
+                if prob is None:
+                    missing.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    probs[i] = prob
+            counts = np.bincount(inverse, minlength=len(rows))
+            n_missed = int(counts[missing].sum()) if missing else 0
+            self.misses += n_missed
+            self.hits += len(X) - n_missed
+
+        if missing:
+            probs[missing] = scorer(rows[missing])
+            with self._lock:
+                # only keep the results if the model did not change meanwhile
+                if self._scorers.get(model_key) is scorer:
+                    for i in missing:
+                        self._entries[keys[i]] = float(probs[i])
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+
+        return probs[inverse]
+
+    def invalidate(self, model_key: ModelKey):
+        with self._lock:
+            self._drop(model_key)
+            self._scorers.pop(model_key, None)
+
+    def _drop(self, model_key: ModelKey):
+        stale = [key for key in self._entries if key[:2] == model_key]
+        for key in stale:
+            del self._entries[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "decimals": self.decimals,
+                "max_batch": self.max_batch,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }